@@ -0,0 +1,253 @@
+import os
+import sys
+import json
+import time
+import argparse
+import contextlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import ctpmerge
+import ctpmodel
+import ctpproject
+import ctpjournal
+import ctpexport
+
+# Headless project pipeline: parse an export folder or load a project, merge, compute progress, save and export.
+# Backs the command line batch mode and must stay importable without PyQt6.
+#
+#   python ctptool.py --batch [options] PROJECT [PROJECT ...]
+#
+# A PROJECT is an .EXP export folder (parsed into a new project) or a saved .json/.ctpdb/.ctpsnap project.
+# Projects are processed across a process pool and every finished project is printed as one JSON line.
+
+
+def project_progress(lists):
+
+    # Percentages per tab and "total", computed like the progress bars.
+    counters = {}
+
+    for content_type, rows in lists.items():
+
+        counters[content_type] = ctpmodel.ProgressCounter()
+        counters[content_type].reset(content_type, rows)
+
+    progress = {content_type: counter.percent() for content_type, counter in counters.items()}
+    progress["total"] = ctpmodel.progress_percent(sum(counter.cells for counter in counters.values()), sum(counter.ok for counter in counters.values()), sum(counter.na for counter in counters.values()))
+
+    return progress
+
+
+def output_stem(source):
+
+    # Saved and exported files are named after the folder or project file they came from.
+    return os.path.basename(os.path.abspath(source)) if os.path.isdir(source) else os.path.splitext(os.path.basename(source))[0]
+
+
+def output_root(source, output_dir):
+
+    # Outputs go to output_dir, or into the export folder / next to the project file they came from.
+    folder = source if os.path.isdir(source) else os.path.dirname(os.path.abspath(source))
+
+    return os.path.join(output_dir or folder, output_stem(source))
+
+
+def overwrites_source(source, options):
+
+    return bool(options.save) and os.path.isfile(source) and os.path.normcase(os.path.abspath(output_root(source, options.output_dir) + options.save)) == os.path.normcase(os.path.abspath(source))
+
+
+def run_project(source, options):
+
+    # One project from start to end, in a worker process. Log output goes to stderr, stdout is for results.
+    result = {"project": source, "ok": True}
+    timings = {}
+    journal = ctpjournal.EditJournal(ctpjournal.journal_path(source))
+    overwrite = overwrites_source(source, options)
+    start = time.perf_counter()
+
+    def timed(step, function, *args):
+
+        step_start = time.perf_counter()
+        value = function(*args)
+        timings[step] = round(time.perf_counter() - step_start, 4)
+
+        return value
+
+    try:
+
+        with contextlib.redirect_stdout(sys.stderr):
+
+            if os.path.isdir(source):
+
+                project_name = os.path.basename(os.path.abspath(source))
+                users = ctpmodel.UserTable()
+                lists, complete = timed("parse", ctpproject.read_export_folder, source, options.refresh, 0)
+
+                if not complete:
+
+                    result["warning"] = "Some files were not found."
+
+            else:
+
+                folder = os.path.dirname(os.path.abspath(source))
+                project_name, lists, users = timed("load", ctpproject.load_project, source)
+
+                if journal.pending() and overwrite:
+
+                    # Journal positions belong to the file as it was loaded, so they are replayed before any
+                    # re-import and the journal goes away once the project file holds them.
+                    touched = ctpjournal.replay(journal.read_records(), lists, users)
+                    result["journal"] = sum(len(cells) for cells in touched.values())
+
+                elif journal.pending():
+
+                    result["warning"] = "The project has unsaved edits in its edit journal, they were not applied."
+
+                if options.reimport:
+
+                    # Same rule as the Re-Import button: an incomplete export never replaces check results.
+                    new_lists, complete = timed("parse", ctpproject.read_export_folder, folder, options.refresh, 0)
+
+                    if not complete:
+
+                        raise FileNotFoundError(f"Some files were not found in {folder}, re-import skipped.")
+
+                    merged = timed("merge", lambda: {content_type: ctpmerge.merge_rows(lists[content_type], new_lists[content_type]) for content_type in lists})
+                    lists = {content_type: merge_result.rows for content_type, merge_result in merged.items()}
+                    result["merge"] = {content_type: {"added": len(merge_result.added), "removed": len(merge_result.removed), "changed": len(merge_result.changed)} for content_type, merge_result in merged.items()}
+
+            result["name"] = project_name
+            result["rows"] = {content_type: len(rows) for content_type, rows in lists.items()}
+            result["progress"] = progress = timed("progress", project_progress, lists)
+            root = output_root(source, options.output_dir)
+            outputs = []
+
+            if options.save:
+
+                file_name = root + options.save
+                timed("save", ctpproject.save_project, file_name, project_name, lists, users)
+                outputs.append(file_name)
+
+                if overwrite:
+
+                    journal.clear()
+
+            if options.export:
+
+                sheets = timed("clean", lambda: ctpexport.clean_sheets({content_type: (ctpexport.row_columns(content_type, lists[content_type]), progress[content_type]) for _, content_type, _ in ctpexport.SHEETS}))
+
+                for extension in options.export:
+
+                    file_name = root + extension
+                    timed("export" + extension, ctpexport.export_file, extension, file_name, project_name, sheets, progress["total"])
+
+                    if extension in (".csv", ".parquet"):
+
+                        outputs += [ctpexport.sheet_path(file_name, title) for title, _, _ in ctpexport.SHEETS]
+
+                    else:
+
+                        outputs.append(file_name)
+
+            result["outputs"] = outputs
+
+    except Exception as e:
+
+        result["ok"] = False
+        result["error"] = f"{type(e).__name__}: {e}"
+
+    timings["total"] = round(time.perf_counter() - start, 4)
+    result["timings"] = timings
+
+    return result
+
+
+def format_extension(value):
+
+    return value.lower() if value.startswith(".") else "." + value.lower()
+
+
+def parse_arguments(argv):
+
+    parser = argparse.ArgumentParser(prog="ctptool --batch", description="Parse, merge, save and export CTP projects without the window. Prints one JSON line per project.")
+    parser.add_argument("projects", nargs="+", metavar="PROJECT", help="an .EXP export folder or a saved project file (.json, .ctpdb, .ctpsnap)")
+    parser.add_argument("--reimport", action="store_true", help="re-parse the export folder next to each project file and keep the check results of unchanged rows")
+    parser.add_argument("--refresh", action="store_true", help="ignore the parse cache and parse every file")
+    parser.add_argument("--save", type=format_extension, choices=ctpproject.PROJECT_EXTENSIONS, help="save every project as <output dir>/<folder or file name><extension>")
+    parser.add_argument("--export", type=format_extension, action="append", metavar="FORMAT", help=f"export format ({', '.join(ctpexport.EXPORT_FORMATS)} or all), repeat for several formats")
+    parser.add_argument("--output-dir", help="folder for saved and exported files, defaults to the project's own folder")
+    parser.add_argument("--overwrite", action="store_true", help="allow --save to replace a project file it read, its edit journal is applied first")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="number of projects processed at the same time")
+
+    options = parser.parse_args(argv)
+
+    if options.export:
+
+        extensions = ctpexport.available_formats() if ".all" in options.export else options.export
+        unknown = [extension for extension in extensions if extension not in ctpexport.EXPORT_FORMATS]
+
+        if unknown:
+
+            parser.error(f"unknown export format: {', '.join(unknown)}")
+
+        options.export = list(dict.fromkeys(extensions))
+
+    if options.output_dir:
+
+        stems = [output_stem(source) for source in options.projects]
+        duplicates = sorted({stem for stem in stems if stems.count(stem) > 1})
+
+        if duplicates:
+
+            parser.error(f"several projects would write to the same files in --output-dir: {', '.join(duplicates)}")
+
+        os.makedirs(options.output_dir, exist_ok=True)
+
+    if not options.overwrite:
+
+        sources = [source for source in options.projects if overwrites_source(source, options)]
+
+        if sources:
+
+            parser.error(f"--save would overwrite the project file itself: {', '.join(sources)} (use --output-dir or --overwrite)")
+
+    return options
+
+
+def main(argv=None):
+
+    options = parse_arguments(sys.argv[1:] if argv is None else argv)
+    start = time.perf_counter()
+    failed = 0
+
+    def report(result):
+
+        print(json.dumps(result, ensure_ascii=False), flush=True)
+
+        return not result["ok"]
+
+    if options.workers <= 1 or len(options.projects) == 1:
+
+        for source in options.projects:
+
+            failed += report(run_project(source, options))
+
+    else:
+
+        with ProcessPoolExecutor(max_workers=min(options.workers, len(options.projects)), mp_context=multiprocessing.get_context("spawn")) as executor:
+
+            futures = [executor.submit(run_project, source, options) for source in options.projects]
+
+            for future in as_completed(futures):
+
+                failed += report(future.result())
+
+    print(json.dumps({"summary": {"projects": len(options.projects), "failed": failed, "total": round(time.perf_counter() - start, 4)}}), flush=True)
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+
+    multiprocessing.freeze_support()
+    sys.exit(main())
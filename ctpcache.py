@@ -0,0 +1,137 @@
+import os
+import json
+import zlib
+import hashlib
+import ctpmodel
+import ctpparser
+
+# Project-local cache of parsed .EXP files, stored next to the exports as compressed JSON. Export folders are
+# often shared, so the cache holds plain data only and anything that doesn't decode or fit is a cache miss.
+
+CACHE_FILE_NAME = ".ctpcache"
+CACHE_VERSION = 2
+ENTRY_CLASSES = {"io": ctpparser.IOEntry, "manual": ctpparser.ManualEntry, "sequence": ctpparser.SequenceEntry}
+
+
+def file_fingerprint(path):
+
+    stat = os.stat(path)
+    digest = hashlib.blake2b(digest_size=16)
+
+    with open(path, 'rb') as f:
+
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+
+            digest.update(chunk)
+
+    return [stat.st_size, stat.st_mtime_ns, digest.hexdigest()]
+
+
+def cached_entries(entry, content_type, fingerprint):
+
+    # Parsed entries of one cache record, or None when the record is stale or malformed.
+    try:
+
+        stored_type, stored_fingerprint, values = entry
+
+        if stored_type != content_type or stored_fingerprint != fingerprint:
+
+            return None
+
+        entries = [ENTRY_CLASSES[content_type]._make(value) for value in values if isinstance(value, list)]
+
+        if len(entries) != len(values) or not all(isinstance(text, str) for parsed in entries for text in parsed):
+
+            return None
+
+        return entries
+
+    except (TypeError, ValueError):
+
+        return None
+
+
+class ParseCache:
+
+    def __init__(self, folder, refresh=False):
+
+        self.folder = folder
+        self.path = os.path.join(folder, CACHE_FILE_NAME)
+        self.entries = {}
+        self.used = {}
+        self.hits = 0
+        self.parsed = 0
+
+        if not refresh:
+
+            self.load()
+
+    def key(self, file_path):
+
+        return os.path.relpath(file_path, self.folder).replace(os.sep, "/")
+
+    def load(self):
+
+        try:
+
+            with open(self.path, 'rb') as f:
+
+                cache = json.loads(zlib.decompress(f.read()))
+
+            if isinstance(cache, dict) and cache.get("version") == CACHE_VERSION and isinstance(cache.get("entries"), dict):
+
+                self.entries = cache["entries"]
+
+        except FileNotFoundError:
+
+            pass
+
+        except Exception as e:
+
+            print(f"Parse cache was ignored -> {e}")
+
+    def get(self, content_type, file_path):
+
+        key = self.key(file_path)
+        fingerprint = file_fingerprint(file_path)
+        entries = cached_entries(self.entries.get(key), content_type, fingerprint)
+
+        if entries is not None:
+
+            self.used[key] = (content_type, fingerprint, entries)
+            self.hits += 1
+
+            return entries
+
+        self.used[key] = (content_type, fingerprint, None)
+
+        return None
+
+    def put(self, content_type, file_path, entries):
+
+        key = self.key(file_path)
+        fingerprint = self.used[key][1] if key in self.used else file_fingerprint(file_path)
+        self.used[key] = (content_type, fingerprint, entries)
+        self.parsed += 1
+
+    def save(self):
+
+        # Only the files looked up in this run are written back, which evicts deleted or replaced exports.
+        used = {key: entry for key, entry in self.used.items() if entry[2] is not None}
+
+        if not self.parsed and used.keys() == self.entries.keys():
+
+            return
+
+        try:
+
+            with ctpmodel.replace_file(self.path, 'wb') as f:
+
+                f.write(zlib.compress(json.dumps({"version": CACHE_VERSION, "entries": used}, separators=(",", ":")).encode("utf-8"), 1))
+
+            self.entries = used
+            self.parsed = 0
+
+        except Exception as e:
+
+            print(f"Parse cache couldn't be written -> {e}")
@@ -0,0 +1,314 @@
+import os
+import re
+import csv
+import html
+import importlib.util
+from operator import attrgetter
+import ctpmodel
+
+# Project export. The IO, MANUAL and SEQUENCE tables are cleaned once and written as .xlsx, .csv, .parquet
+# or a standalone .html report. Excel sheets are streamed into a write-only workbook: cells of a kind share
+# one style, column widths are known before the first row is written and the progress cells go out with
+# the header row. openpyxl is only imported when exporting, it adds noticeably to the start-up time.
+
+SHEETS = [
+    ("IO", "io", ["Module", "BMK", "Address", "Description", "Check", "Comment"]),
+    ("MANUAL", "manual", ["Name", "BAS", "Check", "Comment1", "WRK", "Check", "Comment2"]),
+    ("SEQUENCE", "sequence", ["Name", "Work Position", "Address", "Check", "Comment"]),
+]
+# A cell nobody has checked yet is exported as "X", like it is shown.
+EXPORT_STATUS_TEXTS = ("X", "X", "OK", "N/A")
+# Control characters that can't be stored in a worksheet (same set openpyxl rejects).
+ILLEGAL_CHARACTERS = re.compile(r"[\000-\010\013\014\016-\037]")
+HTML_STATUS_CLASSES = {"X": "x", "OK": "ok", "N/A": "na"}
+HTML_STYLE = "body{font-family:sans-serif}table{border-collapse:collapse;margin-bottom:2em}th,td{border:1px solid #999;padding:2px 6px;text-align:center}th{background:#ddd}td.ok{background:#c6efce}td.x{background:#ffc7ce}td.na{background:#eee}"
+
+
+def clean_text(text):
+
+    if not text.strip():
+
+        return ""
+
+    # Excel would read these as formulas.
+    if text.strip().startswith(("=", "+", "-")):
+
+        text = " " + text
+
+    return ILLEGAL_CHARACTERS.sub("", text)
+
+
+def row_columns(content_type, rows):
+
+    # Plain values of every column, taken on the GUI thread so the export works on a copy that edits can't change.
+    row_class = ctpmodel.ROW_CLASSES[content_type]
+    columns = []
+
+    for col in range(row_class.column_count()):
+
+        if col in row_class.CHECK_COLUMNS:
+
+            slot = row_class.CHECK_COLUMNS[col][0]
+
+        elif col in row_class.COMMENT_COLUMNS:
+
+            slot = row_class.COMMENT_COLUMNS[col][0]
+
+        else:
+
+            slot = row_class.TEXT_COLUMNS[col]
+
+        columns.append(list(map(attrgetter(slot), rows)))
+
+    return columns
+
+
+def clean_columns(content_type, columns, headers):
+
+    # Returns the cell texts and the widest text of every column. Statuses go through a lookup table.
+    row_class = ctpmodel.ROW_CLASSES[content_type]
+    cleaned = []
+    widths = []
+
+    for col, (values, header) in enumerate(zip(columns, headers)):
+
+        if col in row_class.CHECK_COLUMNS:
+
+            texts = list(map(EXPORT_STATUS_TEXTS.__getitem__, values))
+
+        else:
+
+            texts = list(map(clean_text, values))
+
+        cleaned.append(texts)
+        widths.append(max(len(header), max(map(len, texts), default=0)))
+
+    return cleaned, widths
+
+
+def cell_styles():
+
+    from openpyxl.styles import Alignment, Border, Font, Side
+
+    thin_border = Border(left=Side(style='thin'), right=Side(style='thin'), top=Side(style='thin'), bottom=Side(style='thin'))
+
+    return {
+        "cell": {"alignment": Alignment(horizontal='center', vertical='center', wrap_text=True)},
+        "header": {"alignment": Alignment(horizontal='center', vertical='center', wrap_text=True), "font": Font(bold=True), "border": thin_border},
+        "progress": {"alignment": Alignment(horizontal='center', vertical='center'), "font": Font(bold=True), "border": thin_border},
+    }
+
+
+def styled_cell(ws, style, value=None):
+
+    from openpyxl.cell import WriteOnlyCell
+
+    cell = WriteOnlyCell(ws, value)
+
+    for name, attribute in style.items():
+
+        setattr(cell, name, attribute)
+
+    return cell
+
+
+def write_sheet(wb, styles, title, headers, columns, widths, progress_texts):
+
+    from openpyxl.utils import get_column_letter
+
+    ws = wb.create_sheet(title)
+
+    for col, width in enumerate(widths, 1):
+
+        ws.column_dimensions[get_column_letter(col)].width = width + 3
+
+    # The progress cells sit right of the header row.
+    for col, text in enumerate(progress_texts, len(headers) + 1):
+
+        ws.column_dimensions[get_column_letter(col)].width = len(text) + 5
+
+    if progress_texts:
+
+        ws.row_dimensions[1].height = 20
+
+    ws.append([styled_cell(ws, styles["header"], text) for text in headers] + [styled_cell(ws, styles["progress"], text) for text in progress_texts])
+
+    # A row is serialized as soon as it is appended, so one set of styled cells is refilled for every row.
+    cells = [styled_cell(ws, styles["cell"]) for _ in headers]
+
+    for texts in zip(*columns):
+
+        for cell, text in zip(cells, texts):
+
+            cell.value = text or None
+
+        ws.append(cells)
+
+
+def clean_sheets(sheets):
+
+    # sheets maps a tab to its row_columns() and progress percentage, the result to its cell texts, column
+    # widths and progress percentage. Every export format is written from these.
+    cleaned = {}
+
+    for _, content_type, headers in SHEETS:
+
+        columns, progress = sheets[content_type]
+        cleaned[content_type] = (*clean_columns(content_type, columns, headers), progress)
+
+    return cleaned
+
+
+def progress_texts(title, content_type, progress, total_progress):
+
+    texts = [f"{title} Progress: {progress}%"]
+
+    if content_type == "io":
+
+        texts.append(f"TOTAL Progress: {total_progress}%")
+
+    return texts
+
+
+def sheet_path(file_name, title):
+
+    # Formats without sheets get one file per tab: report.csv -> report_IO.csv, report_MANUAL.csv, ...
+    root, extension = os.path.splitext(file_name)
+
+    return f"{root}_{title}{extension}"
+
+
+def unique_headers(headers):
+
+    # Columnar readers need distinct column names, the MANUAL tab has two "Check" columns.
+    names = []
+
+    for header in headers:
+
+        name = header
+        number = 1
+
+        while name in names:
+
+            number += 1
+            name = f"{header}{number}"
+
+        names.append(name)
+
+    return names
+
+
+def write_xlsx(file_name, project_name, sheets, total_progress):
+
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    styles = cell_styles()
+
+    for title, content_type, headers in SHEETS:
+
+        columns, widths, progress = sheets[content_type]
+        write_sheet(wb, styles, title, headers, columns, widths, progress_texts(title, content_type, progress, total_progress))
+
+    wb.save(file_name)
+
+
+def write_csv(file_name, project_name, sheets, total_progress):
+
+    for title, content_type, headers in SHEETS:
+
+        columns = sheets[content_type][0]
+
+        # utf-8-sig so Excel picks the right encoding when the file is double-clicked.
+        with open(sheet_path(file_name, title), 'w', newline="", encoding="utf-8-sig") as f:
+
+            writer = csv.writer(f)
+            writer.writerow(headers)
+            writer.writerows(zip(*columns))
+
+
+def available_formats():
+
+    # Parquet needs the optional pyarrow package.
+    return [extension for extension in EXPORT_FORMATS if extension != ".parquet" or importlib.util.find_spec("pyarrow") is not None]
+
+
+def write_parquet(file_name, project_name, sheets, total_progress):
+
+    # pyarrow is optional, the export dialog only offers Parquet when it is installed.
+    try:
+
+        import pyarrow
+        import pyarrow.parquet
+
+    except ImportError as e:
+
+        raise ImportError("Parquet export needs the pyarrow package.") from e
+
+    for title, content_type, headers in SHEETS:
+
+        columns = sheets[content_type][0]
+        row_class = ctpmodel.ROW_CLASSES[content_type]
+        arrays = []
+
+        for col, texts in enumerate(columns):
+
+            array = pyarrow.array(texts, type=pyarrow.string())
+
+            # Only a handful of different statuses, stored once per column chunk.
+            arrays.append(array.dictionary_encode() if col in row_class.CHECK_COLUMNS else array)
+
+        pyarrow.parquet.write_table(pyarrow.table(arrays, names=unique_headers(headers)), sheet_path(file_name, title))
+
+
+def write_html(file_name, project_name, sheets, total_progress):
+
+    escape = html.escape
+    parts = [f"<!DOCTYPE html>\n<html>\n<head>\n<meta charset=\"utf-8\">\n<title>{escape(project_name)}</title>\n<style>{HTML_STYLE}</style>\n</head>\n<body>\n"]
+    parts.append(f"<h1>{escape(project_name)}</h1>\n")
+
+    for title, content_type, headers in SHEETS:
+
+        columns, _, progress = sheets[content_type]
+        row_class = ctpmodel.ROW_CLASSES[content_type]
+
+        parts.append(f"<h2>{title}</h2>\n<p>{' | '.join(progress_texts(title, content_type, progress, total_progress))}</p>\n<table>\n<tr>")
+        parts.append("".join(f"<th>{escape(header)}</th>" for header in headers))
+        parts.append("</tr>\n")
+
+        for texts in zip(*columns):
+
+            parts.append("<tr>")
+
+            for col, text in enumerate(texts):
+
+                # Status cells get a class so the report can color them.
+                if col in row_class.CHECK_COLUMNS:
+
+                    parts.append(f"<td class=\"{HTML_STATUS_CLASSES[text]}\">{escape(text)}</td>")
+
+                else:
+
+                    parts.append(f"<td>{escape(text)}</td>")
+
+            parts.append("</tr>\n")
+
+        parts.append("</table>\n")
+
+    parts.append("</body>\n</html>\n")
+
+    with open(file_name, 'w', encoding="utf-8") as f:
+
+        f.write("".join(parts))
+
+
+EXPORT_FORMATS = {".xlsx": write_xlsx, ".csv": write_csv, ".parquet": write_parquet, ".html": write_html}
+FORMAT_NAMES = {".xlsx": "Excel Files", ".csv": "CSV Files", ".parquet": "Parquet Files", ".html": "HTML Report"}
+
+
+def export_file(extension, file_name, project_name, sheets, total_progress):
+
+    # Runs in a worker process when several formats are exported at once.
+    EXPORT_FORMATS[extension](file_name, project_name, sheets, total_progress)
+
+    return file_name
@@ -0,0 +1,181 @@
+import os
+import json
+import ctpmodel
+
+# Append-only journal of check and comment edits, kept next to the project file until the next save.
+# One line per edited cell: [tab, row position, column, value, user].
+
+JOURNAL_SUFFIX = ".journal"
+SAVING_SUFFIX = ".saving"
+COMPACT_SIZE = 256 * 1024
+
+
+def journal_path(project_file):
+
+    return project_file + JOURNAL_SUFFIX
+
+
+class EditJournal:
+
+    def __init__(self, path):
+
+        self.path = path
+        self.saving_path = path + SAVING_SUFFIX
+        self.fd = None
+        self.size = os.path.getsize(path) if os.path.exists(path) else 0
+
+    def append(self, records):
+
+        # One write and one fsync per edit (or bulk edit), the cost doesn't depend on the project size.
+        # Records are plain ASCII, so a write cut off by a crash never splits a multi-byte character.
+        data = "".join(json.dumps(record, separators=(",", ":")) + "\n" for record in records).encode("ascii")
+
+        if self.fd is None:
+
+            self.fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+        os.write(self.fd, data)
+        os.fsync(self.fd)
+        self.size += len(data)
+
+    def close(self):
+
+        if self.fd is not None:
+
+            os.close(self.fd)
+            self.fd = None
+
+    def rotate(self):
+
+        # Called right before a save: the records so far move aside and are removed once the save succeeded.
+        # A failed save leaves them there, a later rotation appends to them.
+        self.close()
+
+        if not os.path.exists(self.path):
+
+            return
+
+        if os.path.exists(self.saving_path):
+
+            with open(self.saving_path, 'ab') as saving, open(self.path, 'rb') as f:
+
+                saving.write(f.read())
+
+            os.remove(self.path)
+
+        else:
+
+            os.replace(self.path, self.saving_path)
+
+        self.size = 0
+
+    def remove_saved(self):
+
+        if os.path.exists(self.saving_path):
+
+            os.remove(self.saving_path)
+
+    def pending(self):
+
+        return os.path.exists(self.saving_path) or os.path.exists(self.path)
+
+    def read_records(self):
+
+        records = []
+
+        for path in (self.saving_path, self.path):
+
+            if not os.path.exists(path):
+
+                continue
+
+            # Read as bytes, json.loads decodes every line inside the try.
+            with open(path, 'rb') as f:
+
+                for line in f:
+
+                    try:
+
+                        records.append(json.loads(line))
+
+                    except ValueError:
+
+                        # Last line of a journal that was cut off mid-write.
+                        continue
+
+        return records
+
+    def clear(self):
+
+        self.close()
+
+        for path in (self.saving_path, self.path):
+
+            if os.path.exists(path):
+
+                os.remove(path)
+
+        self.size = 0
+
+
+def cell_records(content_type, rows, cells, users):
+
+    row_class = ctpmodel.ROW_CLASSES[content_type]
+    records = []
+
+    for position, col in cells:
+
+        if col in row_class.CHECK_COLUMNS:
+
+            status, user_id = rows[position].check(col)
+            records.append([content_type, position, col, ctpmodel.STATUS_TEXTS[status], users.name(user_id)])
+
+        else:
+
+            text, user_id = rows[position].comment(col)
+            records.append([content_type, position, col, text, users.name(user_id)])
+
+    return records
+
+
+def replay(records, lists, users):
+
+    # Applies journal records in order onto freshly loaded rows and returns the cells that were touched.
+    touched = {content_type: set() for content_type in lists}
+
+    for record in records:
+
+        if not isinstance(record, list) or len(record) != 5:
+
+            continue
+
+        content_type, position, col, value, user = record
+
+        # A damaged line can still be valid JSON, only well-typed records are applied.
+        if not all(isinstance(field, kind) for field, kind in ((content_type, str), (position, int), (col, int), (value, str), (user, str))):
+
+            continue
+
+        rows = lists.get(content_type)
+
+        if rows is None or not 0 <= position < len(rows):
+
+            continue
+
+        row_class = ctpmodel.ROW_CLASSES[content_type]
+
+        if col in row_class.CHECK_COLUMNS:
+
+            rows[position].set_check(col, ctpmodel.STATUS_VALUES.get(value, int(ctpmodel.Status.UNSET)), users.intern(user))
+
+        elif col in row_class.COMMENT_COLUMNS:
+
+            rows[position].set_comment(col, value, users.intern(user))
+
+        else:
+
+            continue
+
+        touched[content_type].add((position, col))
+
+    return touched
@@ -0,0 +1,135 @@
+import json
+import ctpmodel
+
+# Project files in the JSON layout. Saves are written with one row per line: still plain JSON for older
+# versions of the tool, but a load can decode rows line by line and hand them out while the file is read.
+
+FORMAT_VERSION = 2
+LIST_KEYS = {"io_list": "io", "manual_list": "manual", "sequence_list": "sequence"}
+LOAD_BATCH_SIZE = 2000
+
+
+def write_project(f, project_name, lists, users):
+
+    encode = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+    sections = list(LIST_KEYS.items())
+
+    f.write(f'{{"project_name":{encode(project_name)},"format":{FORMAT_VERSION},\n')
+
+    for number, (key, content_type) in enumerate(sections):
+
+        rows = lists[content_type]
+
+        f.write(f'"{key}":[\n')
+
+        for position, row in enumerate(rows):
+
+            if position:
+
+                f.write(",\n")
+
+            f.write(encode(row.to_json(users)))
+
+        f.write("\n]" if rows else "]")
+        f.write(",\n" if number < len(sections) - 1 else "\n")
+
+    f.write("}\n")
+
+
+def iter_project(f, users, batch_size=LOAD_BATCH_SIZE):
+
+    # Yields ("project_name", name) first, then (content type, rows) batches in file order.
+    first_line = f.readline().rstrip()
+    header = None
+
+    if first_line.startswith("{") and first_line.endswith(","):
+
+        try:
+
+            header = json.loads(first_line[:-1] + "}")
+
+        except ValueError:
+
+            header = None
+
+    if not header or header.get("format") != FORMAT_VERSION:
+
+        # Saves of older versions are pretty-printed with indent=4 and are decoded in one go.
+        f.seek(0)
+        data = json.load(f)
+
+        yield "project_name", data.get("project_name", "Untitled")
+
+        for key, content_type in LIST_KEYS.items():
+
+            values = data.get(key, [])
+
+            for start in range(0, len(values), batch_size):
+
+                yield content_type, ctpmodel.rows_from_json(content_type, values[start:start + batch_size], users)
+
+        return
+
+    yield "project_name", header.get("project_name", "Untitled")
+
+    loads = json.loads
+    content_type = None
+    decode = None
+    batch = []
+
+    for line in f:
+
+        line = line.rstrip()
+
+        if line.startswith("["):
+
+            batch.append(decode(loads(line[:-1] if line.endswith(",") else line)))
+
+            if len(batch) >= batch_size:
+
+                yield content_type, finish_batch(content_type, batch)
+                batch = []
+
+        elif line.startswith('"'):
+
+            content_type = LIST_KEYS.get(line.split(":", 1)[0].strip('"'))
+            decode = ctpmodel.ROW_CLASSES[content_type].json_decoder(users) if content_type else None
+
+        elif line.startswith("]") and batch:
+
+            yield content_type, finish_batch(content_type, batch)
+            batch = []
+
+
+def finish_batch(content_type, rows):
+
+    if content_type == "io":
+
+        ctpmodel.intern_modules(rows)
+
+    return rows
+
+
+def read_counts(f):
+
+    # Returns (project name, {content type: (check cells, OK cells, N/A cells)}) without building rows.
+    # Both layouts are plain JSON, so the file is decoded in one go.
+    data = json.load(f)
+    counts = {}
+
+    for key, content_type in LIST_KEYS.items():
+
+        values = data.get(key, [])
+        cells = ok = na = 0
+
+        for col in ctpmodel.ROW_CLASSES[content_type].CHECK_COLUMNS:
+
+            # Check cells are [status, user], saves of older versions hold the bare status.
+            statuses = [cell[0] if type(cell) is list else cell for cell in (row[col] for row in values)]
+            cells += len(statuses)
+            ok += statuses.count("OK")
+            na += statuses.count("N/A")
+
+        counts[content_type] = (cells, ok, na)
+
+    return data.get("project_name", "Untitled"), counts
@@ -0,0 +1,46 @@
+from collections import namedtuple, deque
+
+# Merges a freshly parsed export into an existing project so check results survive a PLC program change.
+
+MergeResult = namedtuple("MergeResult", ["rows", "added", "removed", "changed"])
+
+
+def merge_rows(old_rows, new_rows):
+
+    # Rows are joined on Row.key(): module + BMK + address for IO, name for manual, name + work position for sequence.
+    # Duplicated keys are matched in their original order, so every old row is used at most once.
+    old_index = {}
+
+    for row in old_rows:
+
+        old_index.setdefault(row.key(), deque()).append(row)
+
+    rows = []
+    added = []
+    changed = []
+
+    for new_row in new_rows:
+
+        matches = old_index.get(new_row.key())
+
+        if not matches:
+
+            added.append(new_row)
+            rows.append(new_row)
+
+            continue
+
+        old_row = matches.popleft()
+
+        if old_row.texts() != new_row.texts():
+
+            changed.append(new_row)
+            rows.append(new_row)
+
+            continue
+
+        rows.append(old_row)
+
+    removed = [row for matches in old_index.values() for row in matches]
+
+    return MergeResult(rows, added, removed, changed)
@@ -0,0 +1,469 @@
+import os
+import sys
+import enum
+import threading
+import contextlib
+from operator import attrgetter
+
+# Compact row model for the IO, MANUAL and SEQUENCE tabs. Check cells hold a small-int Status and comment
+# cells hold their text, both next to a user id from the project's UserTable instead of a repeated name.
+
+
+class Status(enum.IntEnum):
+
+    UNSET = 0
+    X = 1
+    OK = 2
+    NA = 3
+
+
+STATUS_TEXTS = (".", "X", "OK", "N/A")
+STATUS_VALUES = {text: status for status, text in enumerate(STATUS_TEXTS)}
+
+
+class UserTable:
+
+    def __init__(self):
+
+        self.names = [""]
+        self.ids = {"": 0}
+
+    def intern(self, name):
+
+        user_id = self.ids.get(name)
+
+        if user_id is None:
+
+            user_id = self.ids[name] = len(self.names)
+            self.names.append(name)
+
+        return user_id
+
+    def name(self, user_id):
+
+        return self.names[user_id]
+
+
+class Row:
+
+    __slots__ = ()
+
+    # column index -> slot name for fixed texts, (value slot, user slot) for check and comment cells
+    TEXT_COLUMNS = {}
+    CHECK_COLUMNS = {}
+    COMMENT_COLUMNS = {}
+    KEY_COLUMNS = ()
+
+    def __init__(self, *texts):
+
+        for slot, text in zip(self.TEXT_COLUMNS.values(), texts):
+
+            setattr(self, slot, text)
+
+        for status_slot, user_slot in self.CHECK_COLUMNS.values():
+
+            setattr(self, status_slot, int(Status.UNSET))
+            setattr(self, user_slot, 0)
+
+        for text_slot, user_slot in self.COMMENT_COLUMNS.values():
+
+            setattr(self, text_slot, "")
+            setattr(self, user_slot, 0)
+
+    @classmethod
+    def column_count(cls):
+
+        return len(cls.TEXT_COLUMNS) + len(cls.CHECK_COLUMNS) + len(cls.COMMENT_COLUMNS)
+
+    def text(self, col):
+
+        return getattr(self, self.TEXT_COLUMNS[col])
+
+    def texts(self):
+
+        return tuple(getattr(self, slot) for slot in self.TEXT_COLUMNS.values())
+
+    def key(self):
+
+        return tuple(getattr(self, self.TEXT_COLUMNS[col]) for col in self.KEY_COLUMNS)
+
+    def check(self, col):
+
+        status_slot, user_slot = self.CHECK_COLUMNS[col]
+
+        return getattr(self, status_slot), getattr(self, user_slot)
+
+    def set_check(self, col, status, user_id):
+
+        status_slot, user_slot = self.CHECK_COLUMNS[col]
+        setattr(self, status_slot, status)
+        setattr(self, user_slot, user_id)
+
+    def comment(self, col):
+
+        text_slot, user_slot = self.COMMENT_COLUMNS[col]
+
+        return getattr(self, text_slot), getattr(self, user_slot)
+
+    def set_comment(self, col, text, user_id):
+
+        text_slot, user_slot = self.COMMENT_COLUMNS[col]
+        setattr(self, text_slot, text)
+        setattr(self, user_slot, user_id)
+
+    def to_json(self, users):
+
+        # Same layout as the original save files: plain strings plus [value, user] pairs.
+        row = []
+
+        for col in range(self.column_count()):
+
+            if col in self.CHECK_COLUMNS:
+
+                status, user_id = self.check(col)
+                row.append([STATUS_TEXTS[status], users.names[user_id]])
+
+            elif col in self.COMMENT_COLUMNS:
+
+                text, user_id = self.comment(col)
+                row.append([text, users.names[user_id]])
+
+            else:
+
+                row.append(self.text(col))
+
+        return row
+
+    @classmethod
+    def json_decoder(cls, users):
+
+        # Builds a decoder for one saved row list with the column positions of this row type looked up once.
+        new = cls.__new__
+        text_columns = list(cls.TEXT_COLUMNS.items())
+        check_columns = list(cls.CHECK_COLUMNS.items())
+        comment_columns = list(cls.COMMENT_COLUMNS.items())
+        status_values = STATUS_VALUES
+        intern = users.intern
+
+        def decode(values):
+
+            row = new(cls)
+
+            for col, slot in text_columns:
+
+                setattr(row, slot, values[col])
+
+            for col, (status_slot, user_slot) in check_columns:
+
+                cell = values[col]
+
+                if type(cell) is list and len(cell) == 2:
+
+                    setattr(row, status_slot, status_values.get(cell[0], 0))
+                    setattr(row, user_slot, intern(cell[1] or ""))
+
+                else:
+
+                    setattr(row, status_slot, status_values.get(cell, 0))
+                    setattr(row, user_slot, 0)
+
+            for col, (text_slot, user_slot) in comment_columns:
+
+                cell = values[col]
+
+                if type(cell) is list and len(cell) == 2:
+
+                    setattr(row, text_slot, cell[0])
+                    setattr(row, user_slot, intern(cell[1] or ""))
+
+                else:
+
+                    setattr(row, text_slot, cell)
+                    setattr(row, user_slot, 0)
+
+            return row
+
+        return decode
+
+
+class IORow(Row):
+
+    __slots__ = ("module", "bmk", "address", "description", "status", "status_user", "comment_text", "comment_user")
+
+    TEXT_COLUMNS = {0: "module", 1: "bmk", 2: "address", 3: "description"}
+    CHECK_COLUMNS = {4: ("status", "status_user")}
+    COMMENT_COLUMNS = {5: ("comment_text", "comment_user")}
+    KEY_COLUMNS = (0, 1, 2)
+
+
+class ManualRow(Row):
+
+    __slots__ = ("name", "bas", "bas_status", "bas_status_user", "bas_comment", "bas_comment_user",
+                 "wrk", "wrk_status", "wrk_status_user", "wrk_comment", "wrk_comment_user")
+
+    TEXT_COLUMNS = {0: "name", 1: "bas", 4: "wrk"}
+    CHECK_COLUMNS = {2: ("bas_status", "bas_status_user"), 5: ("wrk_status", "wrk_status_user")}
+    COMMENT_COLUMNS = {3: ("bas_comment", "bas_comment_user"), 6: ("wrk_comment", "wrk_comment_user")}
+    KEY_COLUMNS = (0,)
+
+
+class SequenceRow(Row):
+
+    __slots__ = ("name", "work_position", "address", "status", "status_user", "comment_text", "comment_user")
+
+    TEXT_COLUMNS = {0: "name", 1: "work_position", 2: "address"}
+    CHECK_COLUMNS = {3: ("status", "status_user")}
+    COMMENT_COLUMNS = {4: ("comment_text", "comment_user")}
+    KEY_COLUMNS = (0, 1)
+
+
+ROW_CLASSES = {"io": IORow, "manual": ManualRow, "sequence": SequenceRow}
+
+
+def rows_from_entries(content_type, entries):
+
+    row_class = ROW_CLASSES[content_type]
+
+    return [row_class(*entry) for entry in entries]
+
+
+def rows_from_json(content_type, values, users):
+
+    decode = ROW_CLASSES[content_type].json_decoder(users)
+    rows = [decode(row) for row in values]
+
+    if content_type == "io":
+
+        intern_modules(rows)
+
+    return rows
+
+
+def intern_modules(rows):
+
+    # Module names repeat on every IO row, keep one string object per module.
+    for row in rows:
+
+        row.module = sys.intern(row.module)
+
+
+def rows_to_json(rows, users):
+
+    return [row.to_json(users) for row in rows]
+
+
+def progress_counts(content_type, rows):
+
+    # Returns (check cells, OK cells, N/A cells) for one tab.
+    cells = ok = na = 0
+
+    for status_slot, _ in ROW_CLASSES[content_type].CHECK_COLUMNS.values():
+
+        statuses = list(map(attrgetter(status_slot), rows))
+        cells += len(statuses)
+        ok += statuses.count(Status.OK)
+        na += statuses.count(Status.NA)
+
+    return cells, ok, na
+
+
+def progress_percent(cells, ok, na):
+
+    total = cells - na
+
+    return int((ok / total) * 100) if total else 0
+
+
+class ProgressCounter:
+
+    # Keeps one tab's counts current from single cell edits; reset() is the only full scan.
+    def __init__(self):
+
+        self.cells = 0
+        self.ok = 0
+        self.na = 0
+
+    def reset(self, content_type, rows):
+
+        self.cells, self.ok, self.na = progress_counts(content_type, rows)
+
+    def add(self, content_type, rows):
+
+        cells, ok, na = progress_counts(content_type, rows)
+        self.cells += cells
+        self.ok += ok
+        self.na += na
+
+    def update(self, old_status, new_status):
+
+        self.ok += (new_status == Status.OK) - (old_status == Status.OK)
+        self.na += (new_status == Status.NA) - (old_status == Status.NA)
+
+    def update_many(self, old_statuses, new_status):
+
+        self.ok += (new_status == Status.OK) * len(old_statuses) - old_statuses.count(Status.OK)
+        self.na += (new_status == Status.NA) * len(old_statuses) - old_statuses.count(Status.NA)
+
+    def percent(self):
+
+        return progress_percent(self.cells, self.ok, self.na)
+
+
+class RowIndex:
+
+    # Lookup tables behind one tab's search box and filters. Built once per row list and kept current by
+    # update_row() after every edit, so a search only scans the rows that are still candidates.
+    def __init__(self, content_type, rows):
+
+        self.row_class = ROW_CLASSES[content_type]
+        self.rows = rows
+        # Columns are joined with a separator that can't be typed, so a match never spans two cells.
+        self.text_getter = attrgetter(*self.row_class.TEXT_COLUMNS.values(), *(text_slot for text_slot, _ in self.row_class.COMMENT_COLUMNS.values()))
+        self.haystack = [self.row_text(row) for row in rows]
+        self.modules = {}
+        self.statuses = {}
+        self.users = {}
+        self.last_search = ("", None, None)
+
+        if self.row_class is IORow:
+
+            add_positions(self.modules, map(attrgetter("module"), rows))
+
+        for status_slot, user_slot in self.row_class.CHECK_COLUMNS.values():
+
+            add_positions(self.statuses, map(attrgetter(status_slot), rows))
+            add_positions(self.users, map(attrgetter(user_slot), rows))
+
+        for _, user_slot in self.row_class.COMMENT_COLUMNS.values():
+
+            add_positions(self.users, map(attrgetter(user_slot), rows))
+
+        # User id 0 is "nobody", rows nobody touched are not a user filter result.
+        self.users.pop(0, None)
+
+    def row_text(self, row):
+
+        return "\x00".join(self.text_getter(row)).lower()
+
+    def update_row(self, position):
+
+        row = self.rows[position]
+
+        for positions in self.statuses.values():
+
+            positions.discard(position)
+
+        for positions in self.users.values():
+
+            positions.discard(position)
+
+        for col in self.row_class.CHECK_COLUMNS:
+
+            status, user_id = row.check(col)
+            self.statuses.setdefault(status, set()).add(position)
+
+            if user_id:
+
+                self.users.setdefault(user_id, set()).add(position)
+
+        for col in self.row_class.COMMENT_COLUMNS:
+
+            user_id = row.comment(col)[1]
+
+            if user_id:
+
+                self.users.setdefault(user_id, set()).add(position)
+
+        self.haystack[position] = self.row_text(row)
+        self.last_search = ("", None, None)
+
+    def module_names(self):
+
+        return sorted(self.modules)
+
+    def search(self, text="", module=None, statuses=None, user_id=None):
+
+        # Returns the sorted row positions that match, or None when no filter is active.
+        filters = (module, statuses, user_id)
+        candidates = None
+
+        if module is not None:
+
+            candidates = set(self.modules.get(module, ()))
+
+        if statuses is not None:
+
+            found = set().union(*(self.statuses.get(status, ()) for status in statuses))
+            candidates = found if candidates is None else candidates & found
+
+        if user_id is not None:
+
+            found = self.users.get(user_id, set())
+            candidates = set(found) if candidates is None else candidates & found
+
+        if candidates is not None:
+
+            candidates = sorted(candidates)
+
+        text = text.strip().lower()
+
+        if not text:
+
+            self.last_search = ("", None, None)
+
+            return candidates
+
+        last_text, last_filters, last_result = self.last_search
+
+        # Typing one more character can only narrow the previous result, so only those rows are scanned again.
+        if last_text and text.startswith(last_text) and last_filters == filters:
+
+            candidates = last_result
+
+        elif candidates is None:
+
+            candidates = range(len(self.haystack))
+
+        haystack = self.haystack
+        result = [position for position in candidates if text in haystack[position]]
+        self.last_search = (text, filters, result)
+
+        return result
+
+
+def add_positions(index, values):
+
+    groups = {}
+
+    for position, value in enumerate(values):
+
+        groups.setdefault(value, []).append(position)
+
+    for value, positions in groups.items():
+
+        index.setdefault(value, set()).update(positions)
+
+
+@contextlib.contextmanager
+def replace_file(path, mode="w", **kwargs):
+
+    # Project files are written to a temp file next to them that replaces them once complete, so a crash never
+    # leaves a truncated file. The temp name is unique per process and thread, overlapping saves of one file
+    # can't write into each other's temp file.
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+    try:
+
+        with open(temp_path, mode.replace("w", "x"), **kwargs) as f:
+
+            yield f
+
+        os.replace(temp_path, path)
+
+    except BaseException:
+
+        if os.path.exists(temp_path):
+
+            os.remove(temp_path)
+
+        raise
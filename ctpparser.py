@@ -0,0 +1,308 @@
+import os
+import re
+import mmap
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# Headless parsing engine for OpCon Classic .EXP exports. Must stay importable without PyQt6.
+
+IO_MODULE_PATTERN = re.compile(r'\(\*\s*-+\s*([A-Za-z0-9_]+)\s*-+\s*\*\)')
+IO_BMK_PATTERN = re.compile(r'^(\S+)')
+IO_ADDRESS_PATTERN = re.compile(r'AT\s+([^:\s]+)')
+IO_DESCRIPTION_PATTERN = re.compile(r'\(\*e\s+(.*?)\s*\*\)')
+
+MANUAL_TITLE_PATTERN = re.compile(r'\(\*\s*(\d+_[A-Za-z0-9]+_\d+K\d+)\s*\*\)')
+MANUAL_BAS_PATTERN = re.compile(r'\bBAS_\d+K\d+\b')
+MANUAL_WRK_PATTERN = re.compile(r'\bWRK_\d+K\d+\b')
+
+SEQUENCE_NAME_PATTERN = re.compile(r'\(\*\s*(.*?)\s*\*\)')
+SEQUENCE_STEP_PATTERN = re.compile(r'(\S+)\s*:=\s*(.+);')
+
+# Bytes patterns for finding candidate lines in memory-mapped variable exports. Every character the str
+# patterns treat as whitespace (\s), except line breaks, is spelled out as UTF-8 so Unicode spaces such as
+# NBSP are found too. The literal prefixes let the regex engine skip ahead instead of testing every byte.
+WHITESPACE_BYTES = rb'(?:[\t\x0b\x0c\x1c-\x1f ]|\xc2[\x85\xa0]|\xe1\x9a\x80|\xe2\x80[\x80-\x8a\xa8\xa9\xaf]|\xe2\x81\x9f|\xe3\x80\x80)'
+LINE_BREAK_BYTES_PATTERN = re.compile(rb'[\r\n]')
+IO_CANDIDATE_BYTES_PATTERN = re.compile(rb'\(\*' + WHITESPACE_BYTES + rb'*-|AT' + WHITESPACE_BYTES)
+
+MMAP_THRESHOLD = 64 * 1024 * 1024
+
+
+IOEntry = namedtuple("IOEntry", ["module", "bmk", "address", "description"])
+ManualEntry = namedtuple("ManualEntry", ["title", "bas", "wrk"])
+SequenceEntry = namedtuple("SequenceEntry", ["name", "work_position", "address"])
+
+
+def iter_lines(f):
+
+    for line in f:
+
+        line = line.strip()
+
+        if line:
+
+            yield line
+
+
+def parse_io(lines):
+
+    current_module = None
+
+    for line in lines:
+
+        if "(*" in line and "-" in line:
+
+            module_match = IO_MODULE_PATTERN.search(line)
+
+            if module_match:
+
+                current_module = module_match.group(1)
+
+                continue
+
+        if not current_module or "AT" not in line:
+
+            continue
+
+        address_match = IO_ADDRESS_PATTERN.search(line)
+
+        if not address_match or address_match.group(1) == "NULL":
+
+            continue
+
+        bmk = IO_BMK_PATTERN.match(line).group(1)
+
+        if bmk == "(*":
+
+            bmk = "NULL"
+
+        description = "NULL"
+
+        if "(*e" in line:
+
+            description_match = IO_DESCRIPTION_PATTERN.search(line)
+
+            if description_match:
+
+                description = description_match.group(1)
+
+        yield IOEntry(current_module, bmk, address_match.group(1), description)
+
+
+def parse_manual(lines):
+
+    current_title = None
+    current_bas = None
+    current_wrk = None
+
+    for line in lines:
+
+        if "END_PROGRAM" in line:
+
+            break
+
+        if "(*" in line:
+
+            title_match = MANUAL_TITLE_PATTERN.search(line)
+
+            if title_match:
+
+                if current_title:
+
+                    yield ManualEntry(current_title, current_bas or "", current_wrk or "")
+
+                current_title = title_match.group(1)
+                current_bas = None
+                current_wrk = None
+
+                continue
+
+        if "BAS_" in line:
+
+            bas_match = MANUAL_BAS_PATTERN.search(line)
+
+            if bas_match:
+
+                current_bas = bas_match.group()
+
+                continue
+
+        if "WRK_" in line:
+
+            wrk_match = MANUAL_WRK_PATTERN.search(line)
+
+            if wrk_match:
+
+                current_wrk = wrk_match.group()
+
+                continue
+
+    if current_title:
+
+        yield ManualEntry(current_title, current_bas or "", current_wrk or "")
+
+
+def parse_sequence(lines):
+
+    # A step is a "(* name *)" line directly followed by a "position := address;" line.
+    # name_match holds the previous line's name while waiting for its step line.
+    name_match = None
+
+    for line in lines:
+
+        step_match = SEQUENCE_STEP_PATTERN.match(line) if name_match and ":=" in line else None
+
+        if step_match:
+
+            yield SequenceEntry(name_match.group(1), step_match.group(1), step_match.group(2))
+            name_match = None
+
+        else:
+
+            name_match = SEQUENCE_NAME_PATTERN.search(line) if "(*" in line else None
+
+
+def iter_candidate_lines(mm):
+
+    # Lines that may hold a module header or an "AT <address>", decoded and stripped like iter_lines does.
+    line_end = -1
+
+    for candidate in IO_CANDIDATE_BYTES_PATTERN.finditer(mm):
+
+        position = candidate.start()
+
+        if position <= line_end:
+
+            continue
+
+        line_start = max(mm.rfind(b'\n', line_end + 1, position), mm.rfind(b'\r', line_end + 1, position), line_end) + 1
+        line_end = LINE_BREAK_BYTES_PATTERN.search(mm, position)
+        line_end = line_end.start() if line_end else len(mm)
+
+        yield mm[line_start:line_end].decode('utf-8').strip()
+
+
+def iter_io_mmap(path):
+
+    # A bytes scan of the raw file picks the candidate lines and only those are decoded. parse_io skips every
+    # other line anyway, so both modes tokenize with the same str patterns, Unicode whitespace included.
+    with open(path, 'rb') as f:
+
+        if os.fstat(f.fileno()).st_size == 0:
+
+            return
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+
+            yield from parse_io(iter_candidate_lines(mm))
+
+
+PARSERS = {"io": parse_io, "manual": parse_manual, "sequence": parse_sequence}
+
+
+def iter_file(content_type, path, use_mmap=None):
+
+    if content_type not in PARSERS:
+
+        raise ValueError(f"Invalid content type: {content_type}")
+
+    if use_mmap is None:
+
+        use_mmap = content_type == "io" and os.path.getsize(path) >= MMAP_THRESHOLD
+
+    if use_mmap and content_type == "io":
+
+        yield from iter_io_mmap(path)
+
+        return
+
+    with open(path, 'r', encoding='utf-8') as f:
+
+        yield from PARSERS[content_type](iter_lines(f))
+
+
+def parse_file(content_type, path, use_mmap=None):
+
+    return list(iter_file(content_type, path, use_mmap))
+
+
+CONTENT_TYPES = ("io", "manual", "sequence")
+FILE_PREFIXES = (("Var", "io"), ("BM", "manual"), ("SfcDiag", "sequence"))
+
+
+def file_kind(file_name):
+
+    if not file_name.lower().endswith('.exp'):
+
+        return None
+
+    for prefix, content_type in FILE_PREFIXES:
+
+        if file_name.startswith(prefix):
+
+            return content_type
+
+    return None
+
+
+def scan_folder(folder):
+
+    export_files = {content_type: [] for content_type in CONTENT_TYPES}
+    subfolders = []
+
+    with os.scandir(folder) as entries:
+
+        for entry in sorted(entries, key=lambda item: item.name):
+
+            if entry.is_dir(follow_symlinks=False):
+
+                if not entry.name.startswith('.'):
+
+                    subfolders.append(entry.path)
+
+                continue
+
+            content_type = file_kind(entry.name)
+
+            if content_type and entry.is_file():
+
+                export_files[content_type].append(entry.path)
+
+    return export_files, subfolders
+
+
+def find_export_sets(root, max_workers=8):
+
+    # Every folder holding at least one export is one controller. Subtrees are listed concurrently,
+    # which mostly pays off on network shares, and the result is sorted so it never depends on timing.
+    export_sets = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+
+        pending = {executor.submit(scan_folder, root): root}
+
+        while pending:
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+
+            for future in done:
+
+                folder = pending.pop(future)
+                export_files, subfolders = future.result()
+
+                if any(export_files.values()):
+
+                    export_sets[folder] = export_files
+
+                for subfolder in subfolders:
+
+                    pending[executor.submit(scan_folder, subfolder)] = subfolder
+
+    return {controller_name(root, folder): export_sets[folder] for folder in sorted(export_sets, key=lambda folder: os.path.relpath(folder, root).split(os.sep))}
+
+
+def controller_name(root, folder):
+
+    relative = os.path.relpath(folder, root)
+
+    return os.path.basename(os.path.abspath(root)) if relative == "." else relative.replace(os.sep, "/")
@@ -0,0 +1,103 @@
+import os
+import ctpmodel
+import ctpjson
+import ctpstore
+import ctpsnapshot
+import ctpproject
+
+# Progress of every saved project in one folder. Projects are summarized in worker processes and only
+# files whose modification time or size changed since the last scan are read again.
+
+
+def project_files(folder):
+
+    # {file path: (mtime, size)} of the project files directly inside folder.
+    files = {}
+
+    with os.scandir(folder) as entries:
+
+        for entry in entries:
+
+            if entry.is_file() and entry.name.lower().endswith(ctpproject.PROJECT_EXTENSIONS):
+
+                stat = entry.stat()
+                files[entry.path] = (stat.st_mtime_ns, stat.st_size)
+
+    return files
+
+
+def project_summary(file_name):
+
+    # Runs in a worker process, only the counts travel back: {"name": ..., "counts": {tab: (cells, ok, na)}}.
+    # Every format counts statuses without building rows, a snapshot only reads its status columns.
+    if file_name.lower().endswith(ctpstore.PROJECT_EXTENSION):
+
+        project_name, counts = ctpstore.ProjectStore(file_name).read_counts()
+
+    elif file_name.lower().endswith(ctpsnapshot.SNAPSHOT_EXTENSION):
+
+        project_name, counts = ctpsnapshot.read_counts(file_name)
+
+    else:
+
+        with open(file_name, "r", encoding="utf-8") as f:
+
+            project_name, counts = ctpjson.read_counts(f)
+
+    return {"name": project_name, "counts": counts}
+
+
+def tab_percent(counts, content_type):
+
+    return ctpmodel.progress_percent(*counts[content_type])
+
+
+def total_percent(counts):
+
+    # Same rule as the TOTAL progress bar: every check cell of every tab counts once.
+    return ctpmodel.progress_percent(*(sum(values) for values in zip(*counts.values())))
+
+
+class Portfolio:
+
+    def __init__(self, folder):
+
+        self.folder = folder
+        self.stamps = {}
+        self.summaries = {}
+
+    def changes(self):
+
+        # Returns (files to read again, files that are gone).
+        files = project_files(self.folder)
+        changed = {file_name: stamp for file_name, stamp in files.items() if self.stamps.get(file_name) != stamp}
+        removed = [file_name for file_name in self.stamps if file_name not in files]
+
+        return changed, removed
+
+    def update(self, file_name, stamp, summary):
+
+        self.stamps[file_name] = stamp
+        self.summaries[file_name] = summary
+
+    def remove(self, file_name):
+
+        self.stamps.pop(file_name, None)
+        self.summaries.pop(file_name, None)
+
+    def counts(self):
+
+        # Counts summed over every project that could be read, per tab.
+        totals = {content_type: (0, 0, 0) for content_type in ctpmodel.ROW_CLASSES}
+
+        for summary in self.summaries.values():
+
+            if "counts" not in summary:
+
+                continue
+
+            for content_type, values in summary["counts"].items():
+
+                totals[content_type] = tuple(map(sum, zip(totals[content_type], values)))
+
+        return totals
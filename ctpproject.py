@@ -0,0 +1,150 @@
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import ctpparser
+import ctpcache
+import ctpmodel
+import ctpjson
+import ctpstore
+import ctpsnapshot
+
+# Reading export folders and loading/saving project files in any of the project formats. Shared by the window,
+# the batch mode and the portfolio, must stay importable without PyQt6.
+
+PROJECT_EXTENSIONS = (".json", ctpstore.PROJECT_EXTENSION, ctpsnapshot.SNAPSHOT_EXTENSION)
+
+
+def read_export_folder(folder, refresh=False, max_workers=None, on_parsed=None, on_rows=None):
+
+    # Returns ({content type: rows}, complete). complete is False when a controller lacks one of the exports.
+    # max_workers=0 parses in this process, on_parsed(done, total, content_type, file_path) reports progress
+    # and on_rows(content_type, rows) receives the rows of every file as soon as they can be appended.
+    export_sets = ctpparser.find_export_sets(folder)
+    jobs = [(controller, content_type, file_path) for controller, export_files in export_sets.items() for content_type in ctpparser.CONTENT_TYPES for file_path in export_files[content_type]]
+    cache = ctpcache.ParseCache(folder, refresh)
+    results = {}
+    lists = {content_type: [] for content_type in ctpparser.CONTENT_TYPES}
+    released = 0
+
+    def release():
+
+        # Files are appended in discovery order, so the row order never depends on which worker finished first.
+        # With several controllers the first column is tagged as "<controller>/<module or name>".
+        nonlocal released
+
+        while released < len(jobs) and jobs[released][2] in results:
+
+            controller, content_type, file_path = jobs[released]
+            entries = results[file_path]
+
+            if len(export_sets) > 1:
+
+                entries = [type(entry)(f"{controller}/{entry[0]}", *entry[1:]) for entry in entries]
+
+            rows = ctpmodel.rows_from_entries(content_type, entries)
+            lists[content_type].extend(rows)
+            released += 1
+
+            if on_rows is not None:
+
+                on_rows(content_type, rows)
+
+    for _, content_type, file_path in jobs:
+
+        entries = cache.get(content_type, file_path)
+
+        if entries is not None:
+
+            results[file_path] = entries
+
+    release()
+    pending = [(content_type, file_path) for _, content_type, file_path in jobs if file_path not in results]
+
+    def parsed(done, content_type, file_path, entries):
+
+        results[file_path] = entries
+        cache.put(content_type, file_path, entries)
+
+        if on_parsed is not None:
+
+            on_parsed(done, len(jobs), content_type, file_path)
+
+        release()
+
+    if pending and max_workers == 0:
+
+        for done, (content_type, file_path) in enumerate(pending, len(jobs) - len(pending) + 1):
+
+            parsed(done, content_type, file_path, ctpparser.parse_file(content_type, file_path))
+
+    elif pending:
+
+        with ProcessPoolExecutor(max_workers=min(len(pending), max_workers or os.cpu_count() or 1), mp_context=multiprocessing.get_context("spawn")) as executor:
+
+            futures = {executor.submit(ctpparser.parse_file, content_type, file_path): (content_type, file_path) for content_type, file_path in pending}
+
+            for done, future in enumerate(as_completed(futures), len(jobs) - len(pending) + 1):
+
+                parsed(done, *futures[future], future.result())
+
+    cache.save()
+
+    if cache.hits:
+
+        print(f"{cache.hits} file(s) were loaded from the parse cache.")
+
+    complete = bool(export_sets) and all(export_files[content_type] for export_files in export_sets.values() for content_type in ctpparser.CONTENT_TYPES)
+
+    return lists, complete
+
+
+def load_project(file_name):
+
+    # Returns (project name, {content type: rows}, UserTable) for any of the project formats.
+    users = ctpmodel.UserTable()
+
+    if file_name.lower().endswith(ctpstore.PROJECT_EXTENSION):
+
+        project_name, lists = ctpstore.ProjectStore(file_name).read_project(users)
+
+        return project_name, lists, users
+
+    if file_name.lower().endswith(ctpsnapshot.SNAPSHOT_EXTENSION):
+
+        project_name, lists = ctpsnapshot.read_snapshot(file_name, users)
+
+        return project_name, lists, users
+
+    project_name = "Untitled"
+    lists = {content_type: [] for content_type in ctpmodel.ROW_CLASSES}
+
+    with open(file_name, "r", encoding="utf-8") as f:
+
+        for kind, payload in ctpjson.iter_project(f, users):
+
+            if kind == "project_name":
+
+                project_name = payload
+
+            else:
+
+                lists[kind].extend(payload)
+
+    return project_name, lists, users
+
+
+def save_project(file_name, project_name, lists, users):
+
+    if file_name.lower().endswith(ctpstore.PROJECT_EXTENSION):
+
+        ctpstore.ProjectStore(file_name).write_project(project_name, lists, users)
+
+    elif file_name.lower().endswith(ctpsnapshot.SNAPSHOT_EXTENSION):
+
+        ctpsnapshot.write_snapshot(file_name, project_name, lists, users)
+
+    else:
+
+        with ctpmodel.replace_file(file_name, "w", encoding="utf-8") as f:
+
+            ctpjson.write_project(f, project_name, lists, users)
@@ -0,0 +1,261 @@
+import sys
+import mmap
+import json
+import zlib
+import struct
+from array import array
+from operator import attrgetter
+import ctpmodel
+
+# Versioned binary project snapshot. Every row attribute is stored as one column section: texts, comments
+# and user names as ids into a shared string table, statuses as single bytes. Uncompressed sections are
+# read straight from a memory map, compressed ones (zlib) are inflated on open.
+
+SNAPSHOT_EXTENSION = ".ctpsnap"
+MAGIC = b"CTPSNAP\0"
+VERSION = 1
+HEADER = struct.Struct("<8sHHI")
+ENTRY = struct.Struct("<24sIQQQ")
+SECTION_COMPRESSED = 1
+ALIGNMENT = 8
+
+
+class SnapshotError(Exception):
+
+    pass
+
+
+def column_sections(content_type, rows, string_id):
+
+    # (section name, array) pairs for one tab, in the order of the row class slots.
+    row_class = ctpmodel.ROW_CLASSES[content_type]
+    sections = []
+
+    for slot in row_class.TEXT_COLUMNS.values():
+
+        sections.append((f"{content_type}.{slot}", array('I', map(string_id, map(attrgetter(slot), rows)))))
+
+    for status_slot, user_slot in row_class.CHECK_COLUMNS.values():
+
+        sections.append((f"{content_type}.{status_slot}", array('B', map(attrgetter(status_slot), rows))))
+        sections.append((f"{content_type}.{user_slot}", array('I', map(attrgetter(user_slot), rows))))
+
+    for text_slot, user_slot in row_class.COMMENT_COLUMNS.values():
+
+        sections.append((f"{content_type}.{text_slot}", array('I', map(string_id, map(attrgetter(text_slot), rows)))))
+        sections.append((f"{content_type}.{user_slot}", array('I', map(attrgetter(user_slot), rows))))
+
+    return sections
+
+
+def write_snapshot(path, project_name, lists, users, compress=True):
+
+    strings = {}
+
+    def string_id(text):
+
+        return strings.setdefault(text, len(strings))
+
+    user_names = array('I', map(string_id, users.names))
+    sections = [("users", user_names)]
+
+    for content_type in ctpmodel.ROW_CLASSES:
+
+        sections += column_sections(content_type, lists[content_type], string_id)
+
+    # Offsets are in characters of the joined text, so a single decode covers the whole table.
+    offsets = array('I', [0])
+    total = 0
+
+    for text in strings:
+
+        total += len(text)
+        offsets.append(total)
+
+    meta = {"project_name": project_name, "rows": {content_type: len(rows) for content_type, rows in lists.items()}}
+    payloads = [("meta", json.dumps(meta).encode("utf-8")), ("strings.text", "".join(strings).encode("utf-8")), ("strings.offsets", offsets)]
+    payloads += sections
+
+    blobs = []
+
+    for name, payload in payloads:
+
+        raw = payload_bytes(payload)
+        stored = zlib.compress(raw, 1) if compress else raw
+        flags = SECTION_COMPRESSED if compress else 0
+
+        blobs.append((name, flags, stored, len(raw)))
+
+    offset = HEADER.size + ENTRY.size * len(blobs)
+    entries = []
+
+    for name, flags, stored, raw_length in blobs:
+
+        offset += -offset % ALIGNMENT
+        entries.append(ENTRY.pack(name.encode("ascii"), flags, offset, len(stored), raw_length))
+        offset += len(stored)
+
+    with ctpmodel.replace_file(path, 'wb') as f:
+
+        f.write(HEADER.pack(MAGIC, VERSION, 0, len(blobs)))
+        f.write(b"".join(entries))
+
+        for (name, flags, stored, raw_length), entry in zip(blobs, entries):
+
+            f.write(b"\0" * (ENTRY.unpack(entry)[2] - f.tell()))
+            f.write(stored)
+
+
+def payload_bytes(payload):
+
+    if isinstance(payload, array):
+
+        # Sections are little-endian on disk.
+        if sys.byteorder == "big":
+
+            payload = array(payload.typecode, payload)
+            payload.byteswap()
+
+        return payload.tobytes()
+
+    return payload
+
+
+def read_sections(mm):
+
+    magic, version, _, count = HEADER.unpack_from(mm, 0)
+
+    if magic != MAGIC:
+
+        raise SnapshotError("Not a CTP snapshot file.")
+
+    if version != VERSION:
+
+        raise SnapshotError(f"Unsupported snapshot version {version}.")
+
+    sections = {}
+
+    for number in range(count):
+
+        name, flags, offset, length, raw_length = ENTRY.unpack_from(mm, HEADER.size + ENTRY.size * number)
+        sections[name.rstrip(b"\0").decode("ascii")] = (flags, offset, length, raw_length)
+
+    return sections
+
+
+def read_section(view, sections, name):
+
+    flags, offset, length, raw_length = sections[name]
+
+    if flags & SECTION_COMPRESSED:
+
+        return zlib.decompress(view[offset:offset + length])
+
+    return view[offset:offset + length]
+
+
+def read_column(view, sections, name, typecode):
+
+    values = array(typecode)
+    values.frombytes(read_section(view, sections, name))
+
+    if sys.byteorder == "big":
+
+        values.byteswap()
+
+    return values
+
+
+def read_counts(path):
+
+    # Returns (project name, {content type: (check cells, OK cells, N/A cells)}) from the status columns alone.
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+
+        sections = read_sections(mm)
+        view = memoryview(mm)
+
+        try:
+
+            meta = json.loads(bytes(read_section(view, sections, "meta")))
+            counts = {}
+
+            for content_type, row_class in ctpmodel.ROW_CLASSES.items():
+
+                cells = ok = na = 0
+
+                for status_slot, _ in row_class.CHECK_COLUMNS.values():
+
+                    statuses = read_column(view, sections, f"{content_type}.{status_slot}", 'B')
+                    cells += len(statuses)
+                    ok += statuses.count(ctpmodel.Status.OK)
+                    na += statuses.count(ctpmodel.Status.NA)
+
+                counts[content_type] = (cells, ok, na)
+
+        finally:
+
+            view.release()
+
+    return meta.get("project_name", "Untitled"), counts
+
+
+def read_snapshot(path, users):
+
+    # Returns (project name, {content type: rows}), user ids are interned into the given UserTable.
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+
+        sections = read_sections(mm)
+        view = memoryview(mm)
+
+        def section(name):
+
+            return read_section(view, sections, name)
+
+        def column(name, typecode):
+
+            return read_column(view, sections, name, typecode)
+
+        try:
+
+            meta = json.loads(bytes(section("meta")))
+            text = str(section("strings.text"), "utf-8")
+            offsets = column("strings.offsets", 'I')
+            strings = [text[start:end] for start, end in zip(offsets, offsets[1:])]
+            user_ids = [users.intern(strings[string_id]) for string_id in column("users", 'I')]
+            identity = user_ids == list(range(len(user_ids)))
+            lists = {}
+
+            for content_type, row_class in ctpmodel.ROW_CLASSES.items():
+
+                count = meta["rows"].get(content_type, 0)
+                new = row_class.__new__
+                rows = [new(row_class) for _ in range(count)]
+
+                def fill(slot, values):
+
+                    # Member descriptors set a slot from C, one map() call per column.
+                    setter = getattr(row_class, slot).__set__
+                    list(map(setter, rows, values))
+
+                for slot in row_class.TEXT_COLUMNS.values():
+
+                    fill(slot, map(strings.__getitem__, column(f"{content_type}.{slot}", 'I')))
+
+                for status_slot, user_slot in row_class.CHECK_COLUMNS.values():
+
+                    fill(status_slot, column(f"{content_type}.{status_slot}", 'B'))
+                    fill(user_slot, column(f"{content_type}.{user_slot}", 'I') if identity else map(user_ids.__getitem__, column(f"{content_type}.{user_slot}", 'I')))
+
+                for text_slot, user_slot in row_class.COMMENT_COLUMNS.values():
+
+                    fill(text_slot, map(strings.__getitem__, column(f"{content_type}.{text_slot}", 'I')))
+                    fill(user_slot, column(f"{content_type}.{user_slot}", 'I') if identity else map(user_ids.__getitem__, column(f"{content_type}.{user_slot}", 'I')))
+
+                # Repeated texts like module names already share one string object through the string table.
+                lists[content_type] = rows
+
+        finally:
+
+            view.release()
+
+    return meta.get("project_name", "Untitled"), lists
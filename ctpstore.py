@@ -0,0 +1,150 @@
+import os
+import sqlite3
+import pathlib
+from contextlib import closing
+import ctpmodel
+
+# Optional SQLite project format. Rows and their check/comment cells live in separate tables, so saving an
+# opened project only writes the cells that were edited since the last save.
+
+PROJECT_EXTENSION = ".ctpdb"
+SCHEMA_VERSION = 1
+
+
+def row_table(content_type):
+
+    return f"{content_type}_rows"
+
+
+class ProjectStore:
+
+    def __init__(self, path):
+
+        self.path = path
+
+    def connect(self):
+
+        # One short-lived connection per operation, saves run on a worker thread. The rollback journal (not WAL)
+        # keeps readers from creating -wal/-shm files next to the project, stores written in WAL mode are converted.
+        connection = sqlite3.connect(self.path)
+        connection.execute("PRAGMA journal_mode=DELETE")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        self.create_schema(connection)
+
+        return connection
+
+    def connect_read_only(self):
+
+        # Loads and portfolio scans never change the file: no schema, no journal mode switch, works on read-only shares.
+        return sqlite3.connect(pathlib.Path(os.path.abspath(self.path)).as_uri() + "?mode=ro", uri=True)
+
+    def create_schema(self, connection):
+
+        with connection:
+
+            connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            connection.execute("CREATE TABLE IF NOT EXISTS users (id INTEGER PRIMARY KEY, name TEXT NOT NULL)")
+
+            for content_type, row_class in ctpmodel.ROW_CLASSES.items():
+
+                columns = ", ".join(f"{slot} TEXT" for slot in row_class.TEXT_COLUMNS.values())
+                connection.execute(f"CREATE TABLE IF NOT EXISTS {row_table(content_type)} (position INTEGER PRIMARY KEY, {columns})")
+
+            connection.execute("CREATE TABLE IF NOT EXISTS checks (tab TEXT, position INTEGER, col INTEGER, status INTEGER, user_id INTEGER, PRIMARY KEY (tab, position, col)) WITHOUT ROWID")
+            connection.execute("CREATE TABLE IF NOT EXISTS comments (tab TEXT, position INTEGER, col INTEGER, text TEXT, user_id INTEGER, PRIMARY KEY (tab, position, col)) WITHOUT ROWID")
+
+    def write_meta(self, connection, project_name, users):
+
+        connection.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", [("version", str(SCHEMA_VERSION)), ("project_name", project_name)])
+
+        # Ids are the UserTable ids, which only ever grow, so existing cells keep pointing at the right name.
+        connection.executemany("INSERT OR REPLACE INTO users (id, name) VALUES (?, ?)", list(enumerate(users.names))[1:])
+
+    def write_project(self, project_name, lists, users):
+
+        # Replaces the whole project in one transaction. Untouched cells are not stored.
+        with closing(self.connect()) as connection, connection:
+
+            for table in ["meta", "users", "checks", "comments"] + [row_table(content_type) for content_type in ctpmodel.ROW_CLASSES]:
+
+                connection.execute(f"DELETE FROM {table}")
+
+            self.write_meta(connection, project_name, users)
+
+            for content_type, rows in lists.items():
+
+                row_class = ctpmodel.ROW_CLASSES[content_type]
+                slots = list(row_class.TEXT_COLUMNS.values())
+                placeholders = ", ".join("?" * (len(slots) + 1))
+
+                connection.executemany(f"INSERT INTO {row_table(content_type)} (position, {', '.join(slots)}) VALUES ({placeholders})", ((position, *row.texts()) for position, row in enumerate(rows)))
+                connection.executemany("INSERT INTO checks VALUES (?, ?, ?, ?, ?)", ((content_type, position, col, *row.check(col)) for position, row in enumerate(rows) for col in row_class.CHECK_COLUMNS if row.check(col) != (ctpmodel.Status.UNSET, 0)))
+                connection.executemany("INSERT INTO comments VALUES (?, ?, ?, ?, ?)", ((content_type, position, col, *row.comment(col)) for position, row in enumerate(rows) for col in row_class.COMMENT_COLUMNS if row.comment(col) != ("", 0)))
+
+    def write_cells(self, project_name, lists, users, cells):
+
+        # cells maps a tab to the (row position, column) pairs edited since the last save.
+        with closing(self.connect()) as connection, connection:
+
+            self.write_meta(connection, project_name, users)
+
+            for content_type, changed in cells.items():
+
+                rows = lists[content_type]
+                row_class = ctpmodel.ROW_CLASSES[content_type]
+                checks = [(content_type, position, col, *rows[position].check(col)) for position, col in changed if col in row_class.CHECK_COLUMNS]
+                comments = [(content_type, position, col, *rows[position].comment(col)) for position, col in changed if col in row_class.COMMENT_COLUMNS]
+
+                connection.executemany("INSERT OR REPLACE INTO checks VALUES (?, ?, ?, ?, ?)", checks)
+                connection.executemany("INSERT OR REPLACE INTO comments VALUES (?, ?, ?, ?, ?)", comments)
+
+    def read_counts(self):
+
+        # Returns (project name, {content type: (check cells, OK cells, N/A cells)}) without reading any row.
+        with closing(self.connect_read_only()) as connection:
+
+            meta = dict(connection.execute("SELECT key, value FROM meta"))
+            counts = {}
+
+            for content_type, row_class in ctpmodel.ROW_CLASSES.items():
+
+                rows = connection.execute(f"SELECT COUNT(*) FROM {row_table(content_type)}").fetchone()[0]
+                statuses = dict(connection.execute("SELECT status, COUNT(*) FROM checks WHERE tab = ? GROUP BY status", (content_type,)))
+                counts[content_type] = (rows * len(row_class.CHECK_COLUMNS), statuses.get(ctpmodel.Status.OK, 0), statuses.get(ctpmodel.Status.NA, 0))
+
+        return meta.get("project_name", "Untitled"), counts
+
+    def read_project(self, users):
+
+        # Returns (project name, {content type: rows}), user names are interned into users.
+        with closing(self.connect_read_only()) as connection:
+
+            meta = dict(connection.execute("SELECT key, value FROM meta"))
+            user_ids = {0: 0}
+
+            for user_id, name in connection.execute("SELECT id, name FROM users ORDER BY id"):
+
+                user_ids[user_id] = users.intern(name)
+
+            lists = {}
+
+            for content_type, row_class in ctpmodel.ROW_CLASSES.items():
+
+                slots = ", ".join(row_class.TEXT_COLUMNS.values())
+                rows = [row_class(*values) for values in connection.execute(f"SELECT {slots} FROM {row_table(content_type)} ORDER BY position")]
+
+                for position, col, status, user_id in connection.execute("SELECT position, col, status, user_id FROM checks WHERE tab = ?", (content_type,)):
+
+                    rows[position].set_check(col, status, user_ids.get(user_id, 0))
+
+                for position, col, text, user_id in connection.execute("SELECT position, col, text, user_id FROM comments WHERE tab = ?", (content_type,)):
+
+                    rows[position].set_comment(col, text, user_ids.get(user_id, 0))
+
+                if content_type == "io":
+
+                    ctpmodel.intern_modules(rows)
+
+                lists[content_type] = rows
+
+        return meta.get("project_name", "Untitled"), lists
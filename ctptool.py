@@ -1,23 +1,37 @@
 import os
-import re
 import sys
 import getpass
 import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed, wait, FIRST_COMPLETED
 from PyQt6 import QtWidgets, QtCore, QtGui
-from PyQt6.QtWidgets import QFileDialog, QTableWidgetItem, QWidget, QHBoxLayout, QLineEdit, QProgressBar, QHeaderView, QMessageBox
+from PyQt6.QtWidgets import QFileDialog, QWidget, QHBoxLayout, QProgressBar, QHeaderView, QMessageBox
+import ctpmerge
+import ctpmodel
+import ctpview
+import ctpstore
+import ctpjournal
+import ctpjson
+import ctpsnapshot
+import ctpexport
+import ctpproject
+import ctpportfolio
+import ctpbatch
 
 # To build an .exe file -> python -m PyInstaller ctptool.spec
 
 class MainWindow(QtWidgets.QMainWindow):
 
-    populate_signal = QtCore.pyqtSignal()
+    reimport_signal = QtCore.pyqtSignal(int, str, object)
     status_signal = QtCore.pyqtSignal(str)
+    saved_signal = QtCore.pyqtSignal(bool, str, int)
+    load_signal = QtCore.pyqtSignal(int, str, object)
+    portfolio_signal = QtCore.pyqtSignal(object, str, object)
 
     project_name = "No Project Selected"
+    export_folder = None
     user_name = "Unknown"
-    missing = False
     read = True
-    theme_change = False
     data_saved = True
 
     def __init__(self):
@@ -27,6 +41,21 @@ class MainWindow(QtWidgets.QMainWindow):
         self.io_list = []
         self.manual_list = []
         self.sequence_list = []
+        self.users = ctpmodel.UserTable()
+        self.progress = {"io": ctpmodel.ProgressCounter(), "manual": ctpmodel.ProgressCounter(), "sequence": ctpmodel.ProgressCounter()}
+        self.dirty_tabs = set()
+        self.indexes = {}
+        self.store = None
+        self.dirty_cells = None
+        self.project_file = None
+        self.journal = None
+        self.saving = False
+        self.queued_save = None
+        self.edit_generation = 0
+        self.load_generation = 0
+        self.load_id = 0
+        self.portfolio = None
+        self.portfolio_busy = False
         self.user_name = self.get_user_name()
         self.settings = QtCore.QSettings("BOSCH", "CTP")
         self.current_theme = self.settings.value("theme", "White")
@@ -36,6 +65,10 @@ class MainWindow(QtWidgets.QMainWindow):
         self.resize(1280, 720)
 
         self.status_signal.connect(self.update_status_label)
+        self.saved_signal.connect(self.save_finished)
+        self.reimport_signal.connect(self.reimport_finished)
+        self.load_signal.connect(self.load_progress)
+        self.portfolio_signal.connect(self.portfolio_progress)
 
         central_widget = QWidget()
 
@@ -46,6 +79,10 @@ class MainWindow(QtWidgets.QMainWindow):
 
         new_button = QtWidgets.QPushButton("New Project")
         new_button.clicked.connect(self.new_project)
+        new_button.setToolTip("Hold Shift to reparse every .EXP file instead of using the parse cache.")
+        reimport_button = QtWidgets.QPushButton("Re-Import")
+        reimport_button.clicked.connect(self.reimport_project)
+        reimport_button.setToolTip("Reparse changed .EXP files and keep the check results of unchanged rows.")
         load_button = QtWidgets.QPushButton("Load Data")
         load_button.clicked.connect(self.load_data)
         save_button = QtWidgets.QPushButton("Save Data")
@@ -77,6 +114,7 @@ class MainWindow(QtWidgets.QMainWindow):
         top_bar.addWidget(self.selected_project)
         top_bar.addStretch()
         top_bar.addWidget(new_button)
+        top_bar.addWidget(reimport_button)
         top_bar.addWidget(load_button)
         top_bar.addWidget(save_button)
         top_bar.addWidget(export_button)
@@ -84,6 +122,30 @@ class MainWindow(QtWidgets.QMainWindow):
         top_bar.addWidget(self.theme_selector)
         top_bar.addWidget(self.user_name_label)
 
+        self.search_box = QtWidgets.QLineEdit()
+        self.search_box.setPlaceholderText("Search name, BMK, address, description or comment...")
+        self.search_box.setClearButtonEnabled(True)
+        self.search_box.textChanged.connect(self.apply_filters)
+        self.module_filter = QtWidgets.QComboBox()
+        self.module_filter.addItem("All Modules")
+        self.module_filter.currentIndexChanged.connect(self.apply_filters)
+        self.status_filter = QtWidgets.QComboBox()
+        self.status_filter.addItems(["All Statuses"] + ctpview.STATUS_CHOICES)
+        self.status_filter.currentIndexChanged.connect(self.apply_filters)
+        self.user_filter = QtWidgets.QComboBox()
+        self.user_filter.addItem("All Users")
+        self.user_filter.currentIndexChanged.connect(self.apply_filters)
+
+        filter_bar = QtWidgets.QHBoxLayout()
+        filter_bar.addWidget(QtWidgets.QLabel("SEARCH :"))
+        filter_bar.addWidget(self.search_box)
+        filter_bar.addWidget(QtWidgets.QLabel("     MODULE :"))
+        filter_bar.addWidget(self.module_filter)
+        filter_bar.addWidget(QtWidgets.QLabel("     STATUS :"))
+        filter_bar.addWidget(self.status_filter)
+        filter_bar.addWidget(QtWidgets.QLabel("     MODIFIED BY :"))
+        filter_bar.addWidget(self.user_filter)
+
         self.overview_widget = QWidget()
         self.overview_layout = QtWidgets.QVBoxLayout(self.overview_widget)
         self.overview_layout.setAlignment(QtCore.Qt.AlignmentFlag.AlignCenter)
@@ -96,36 +158,52 @@ class MainWindow(QtWidgets.QMainWindow):
         self.create_progress_display("SEQUENCE", self.overview_layout)
         self.overview_layout.addStretch()
 
-        self.io_table = self.create_table(["Module", "BMK", "Address", "Description", "Check", "Comment"], stretch_cols=[5])
-        self.manual_table = self.create_table(["Name", "BAS", "Check", "Comment", "WRK", "Check", "Comment"], stretch_cols=[3, 6])
-        self.sequence_table = self.create_table(["Name", "Work Position", "Address", "Check", "Comment"], stretch_cols=[4])
+        self.io_model = ctpview.RowTableModel(self, "io", ["Module", "BMK", "Address", "Description", "Check", "Comment"])
+        self.manual_model = ctpview.RowTableModel(self, "manual", ["Name", "BAS", "Check", "Comment", "WRK", "Check", "Comment"])
+        self.sequence_model = ctpview.RowTableModel(self, "sequence", ["Name", "Work Position", "Address", "Check", "Comment"])
+        self.io_table = self.create_table(self.io_model, stretch_cols=[5])
+        self.manual_table = self.create_table(self.manual_model, stretch_cols=[3, 6])
+        self.sequence_table = self.create_table(self.sequence_model, stretch_cols=[4])
+        self.models = {"io": self.io_model, "manual": self.manual_model, "sequence": self.sequence_model}
+
+        for model in self.models.values():
+
+            model.fill_progress.connect(self.fill_progress_changed)
 
         self.tabs = QtWidgets.QTabWidget()
         self.tabs.addTab(self.overview_widget, "OVERVIEW")
         self.tabs.addTab(self.io_table, "IO")
         self.tabs.addTab(self.manual_table, "MANUAL")
         self.tabs.addTab(self.sequence_table, "SEQUENCE")
-        self.populate_signal.connect(self.populate_tables)
+        self.tabs.addTab(self.create_portfolio_tab(), "PORTFOLIO")
         self.tabs.currentChanged.connect(self.on_tab_changed)
 
         self.progress_label = QtWidgets.QLabel(" PROGRESS WILL SHOWN HERE : ")
         self.progress_label.setAlignment(QtCore.Qt.AlignmentFlag.AlignLeft)
         self.progress_bar = QProgressBar()
         self.progress_bar.setFixedHeight(15)
+        self.cancel_fill_button = QtWidgets.QPushButton("Cancel")
+        self.cancel_fill_button.setToolTip("Stop filling the table, the remaining rows are loaded while scrolling.")
+        self.cancel_fill_button.clicked.connect(self.cancel_fill)
+        self.cancel_fill_button.hide()
 
         progress_layout = QtWidgets.QHBoxLayout()
         progress_layout.addWidget(self.progress_label)
         progress_layout.addWidget(self.progress_bar)
+        progress_layout.addWidget(self.cancel_fill_button)
 
         self.status_label = QtWidgets.QLabel("INFO: Please create a new project or load your saved data.")
         self.status_label.setAlignment(QtCore.Qt.AlignmentFlag.AlignCenter)
 
         layout = QtWidgets.QVBoxLayout(central_widget)
         layout.addLayout(top_bar)
+        layout.addLayout(filter_bar)
         layout.addWidget(self.tabs)
         layout.addLayout(progress_layout)
         layout.addWidget(self.status_label)
 
+        QtCore.QTimer.singleShot(0, self.recover_last_project)
+
     @QtCore.pyqtSlot(str)
     def update_status_label(self, message):
 
@@ -147,248 +225,482 @@ class MainWindow(QtWidgets.QMainWindow):
 
         def browse_folder():
 
+            # Holding Shift while clicking "New Project" ignores the parse cache and reparses every file.
+            refresh = bool(QtWidgets.QApplication.keyboardModifiers() & QtCore.Qt.KeyboardModifier.ShiftModifier)
             folder = QFileDialog.getExistingDirectory(self, "Select Main Project Location")
 
             if folder:
 
+                # The tables are emptied here and every parsed file reaches them through load_progress, like a loaded project.
                 self.project_name = os.path.basename(folder)
+                self.export_folder = folder
+                self.store = None
+                self.io_list, self.manual_list, self.sequence_list = [], [], []
+                self.users = ctpmodel.UserTable()
+                self.populate_tables()
                 self.status_signal.emit("Reading Files...")
 
-                threading.Thread(target=read_files_thread, args=(folder,), daemon=True).start()
+                threading.Thread(target=read_files_thread, args=(folder, refresh, self.load_id,), daemon=True).start()
 
             else:
 
                 self.status_label.setText("INFO: New project cancelled.")
 
-        def read_files_thread(folder):
+        def read_files_thread(folder, refresh, load_id):
 
-            self.io_list.clear()
-            self.manual_list.clear()
-            self.sequence_list.clear()
+            def rows_read(content_type, rows):
 
-            if not read_files(folder, self.io_list, self.manual_list, self.sequence_list):
+                self.load_signal.emit(load_id, content_type, rows)
 
-                self.missing = True
+            self.read = True
+            _, complete = self.read_files(folder, refresh, rows_read)
+            self.load_signal.emit(load_id, "read", complete)
 
-            if self.read:
+        browse_folder()
+        self.data_saved = False
 
-                self.status_signal.emit("Processing Files...")
+    def reimport_project(self):
 
-            self.populate_signal.emit()
+        def browse_folder():
 
-        def read_files(exp_path, io_list, manual_list, sequence_list):
+            refresh = bool(QtWidgets.QApplication.keyboardModifiers() & QtCore.Qt.KeyboardModifier.ShiftModifier)
+            folder = QFileDialog.getExistingDirectory(self, "Select Main Project Location", self.export_folder or "")
 
-            file_counter = 0
+            if folder:
 
-            for file in os.listdir(exp_path):
+                self.status_signal.emit("Reading Files...")
+                # The worker merges into copies of the current lists, taken here together with the load they belong to.
+                old_lists = {"io": list(self.io_list), "manual": list(self.manual_list), "sequence": list(self.sequence_list)}
 
-                if file.lower().endswith('.exp') and os.path.isfile(os.path.join(exp_path, file)) and file_counter < 3:
+                threading.Thread(target=read_files_thread, args=(folder, refresh, old_lists, self.load_id,), daemon=True).start()
 
-                    try:
+            else:
 
-                        with open(os.path.join(exp_path, file), 'r', encoding='utf-8') as f:
+                self.status_label.setText("INFO: Re-import cancelled.")
 
-                            if file.startswith('Var'):
+        def read_files_thread(folder, refresh, old_lists, load_id):
 
-                                io_full_content = [line.strip() for line in f.readlines() if line.strip()]
-                                process_file("io", io_full_content, io_list)
-                                file_counter += 1
+            # Parse into fresh lists and hand them to the GUI thread, the current rows stay untouched until then.
+            self.read = True
+            lists, complete = self.read_files(folder, refresh)
 
-                            elif file.startswith('BM'):
+            if not complete:
 
-                                manual_full_content = [line.strip() for line in f.readlines() if line.strip()]
-                                process_file("manual", manual_full_content, manual_list)
-                                file_counter += 1
+                if self.read:
 
-                            elif file.startswith('SfcDiag'):
+                    self.status_signal.emit("WARNING: Some files were not found. Re-import cancelled to keep the current check results. Please make sure that you have selected right location.")
 
-                                sequence_full_content = [line.strip() for line in f.readlines() if line.strip()]
-                                process_file("sequence", sequence_full_content, sequence_list)
-                                file_counter += 1
+                return
 
-                    except Exception as e:
+            results = {"io": ctpmerge.merge_rows(old_lists["io"], lists["io"]),
+                       "manual": ctpmerge.merge_rows(old_lists["manual"], lists["manual"]),
+                       "sequence": ctpmerge.merge_rows(old_lists["sequence"], lists["sequence"])}
 
-                        self.read = False
-                        self.status_signal.emit(f"ERROR: Couldn't read the files! Please make sure that you navigate the main project folder and show this message to your developer -> {e}")
+            self.reimport_signal.emit(load_id, folder, results)
 
-                        return False
+        if self.selected_project.text() == "No Project Selected":
 
-            if file_counter == 3:
+            self.status_label.setText("WARNING: Please select a project first.")
 
-                return True
+            return
 
-            else:
+        self.commit_open_editors()
+        browse_folder()
 
-                return False
+    @QtCore.pyqtSlot(int, str, object)
+    def reimport_finished(self, load_id, folder, results):
 
-        def process_file(content_type, full_content, content_list):
+        # A project loaded or created while the export was read keeps its rows.
+        if load_id != self.load_id:
 
-            content_list.clear()
+            self.status_label.setText("INFO: Re-import was dropped, another project was opened meanwhile.")
 
-            if content_type == "io":
+            return
 
-                current_module = None
+        self.export_folder = folder
+        self.io_list = results["io"].rows
+        self.manual_list = results["manual"].rows
+        self.sequence_list = results["sequence"].rows
+        # Journal records point at the old row positions, the merged rows are journaled again after the next save.
+        self.close_journal(discard=True)
+        self.populate_tables()
+        self.data_saved = False
 
-                for line in full_content:
+        summary = []
 
-                    module_match = re.search(r'\(\*\s*-+\s*([A-Za-z0-9_]+)\s*-+\s*\*\)', line)
+        for tab, result in results.items():
 
-                    if module_match:
-                        current_module = module_match.group(1)
+            summary.append(f"{tab.upper()} : {len(result.added)} added, {len(result.removed)} removed, {len(result.changed)} changed")
 
-                        continue
+        self.status_label.setText("INFO: Re-import finished. " + " | ".join(summary))
 
-                    bmk_match = re.match(r'^(\S+)', line)
-                    bmk = bmk_match.group(1) if bmk_match else "NULL"
+    def read_files(self, exp_path, refresh=False, on_rows=None):
 
-                    address_match = re.search(r'AT\s+([^:\s]+)', line)
-                    address = address_match.group(1) if address_match else "NULL"
+        # Returns ({content type: rows}, complete), or (None, False) after a reported error.
+        def parsed(done, total, content_type, file_path):
 
-                    description_match = re.search(r'\(\*e\s+(.*?)\s*\*\)', line)
-                    description = description_match.group(1) if description_match else "NULL"
+            self.status_signal.emit(f"Processing Files... ({done}/{total}) {os.path.basename(file_path)}")
+            print(f"{content_type.upper()} file was processed successfully.")
 
-                    if bmk == "(*":
+        try:
 
-                        bmk = "NULL"
+            return ctpproject.read_export_folder(exp_path, refresh, on_parsed=parsed, on_rows=on_rows)
 
-                    if current_module and address != "NULL":
+        except Exception as e:
 
-                        content_list.append([current_module, bmk, address, description, (".", ""), ("", "")])
+            self.read = False
+            self.status_signal.emit(f"ERROR: Couldn't read the files! Please make sure that you navigate the main project folder and show this message to your developer -> {e}")
 
-                print("IO file was processed successfully.")
+            return None, False
 
-            elif content_type == "manual":
+    def load_data(self):
 
-                current_title = None
-                current_bas = None
-                current_wrk = None
+        def select_file():
 
-                for line in full_content:
+            options = QFileDialog.Option.DontUseNativeDialog
+            file_name, _ = QFileDialog.getOpenFileName(self, "Load Data", "", f"CTP Projects (*{ctpstore.PROJECT_EXTENSION} *{ctpsnapshot.SNAPSHOT_EXTENSION} *.json);;All Files (*)", options=options)
 
-                    if "END_PROGRAM" in line:
+            if not file_name:
 
-                        break
+                self.status_label.setText("INFO: Load cancelled.")
 
-                    title_match = re.search(r'\(\*\s*(\d+_[A-Za-z0-9]+_\d+K\d+)\s*\*\)', line)
+                return
 
-                    if title_match:
+            self.status_label.setText("Loading data...")
+            self.open_project(file_name)
 
-                        if current_title:
+        select_file()
 
-                            content_list.append([current_title, current_bas if current_bas else "", (".", ""), ("", ""),
-                                                 current_wrk if current_wrk else "", (".", ""), ("", "")])
+    def open_project(self, file_name):
 
-                        current_title = title_match.group(1)
-                        current_bas = None
-                        current_wrk = None
+        def transfer_data(file_name):
 
-                        continue
+            # Rows are decoded on a worker thread and reach the tables batch by batch through load_progress.
+            self.io_list, self.manual_list, self.sequence_list = [], [], []
+            self.users = ctpmodel.UserTable()
+            self.populate_tables()
+            self.store = None
+            # Edits made while the rows arrive are tracked for the store from the start and keep the project unsaved.
+            self.load_generation = self.edit_generation
 
-                    bas_match = re.search(r'\bBAS_\d+K\d+\b', line)
+            if file_name.lower().endswith(ctpstore.PROJECT_EXTENSION):
 
-                    if bas_match:
+                self.dirty_cells = {"io": set(), "manual": set(), "sequence": set()}
 
-                        current_bas = bas_match.group()
+            self.status_label.setText("Loading data...")
 
-                        continue
+            threading.Thread(target=read_project_thread, args=(file_name, self.users, self.load_id,), daemon=True).start()
 
-                    wrk_match = re.search(r'\bWRK_\d+K\d+\b', line)
+        def read_project_thread(file_name, users, load_id):
 
-                    if wrk_match:
+            def emit_lists(project_name, lists):
 
-                        current_wrk = wrk_match.group()
+                self.load_signal.emit(load_id, "project_name", project_name)
 
-                        continue
+                for content_type, rows in lists.items():
 
-                if current_title:
+                    self.load_signal.emit(load_id, content_type, rows)
 
-                    content_list.append([current_title, current_bas if current_bas else "", (".", ""), ("", ""), current_wrk if current_wrk else "", (".", ""), ("", "")])
+            try:
 
-                print("Manual file was processed successfully.")
+                if file_name.lower().endswith(ctpstore.PROJECT_EXTENSION):
 
-            elif content_type == "sequence":
+                    emit_lists(*ctpstore.ProjectStore(file_name).read_project(users))
 
-                i = 0
+                elif file_name.lower().endswith(ctpsnapshot.SNAPSHOT_EXTENSION):
 
-                while i < len(full_content) - 1:
+                    emit_lists(*ctpsnapshot.read_snapshot(file_name, users))
 
-                    line1 = full_content[i]
-                    line1_match = re.search(r'\(\*\s*(.*?)\s*\*\)', line1)
+                else:
 
-                    line2 = full_content[i + 1]
-                    line2_match = re.match(r'(\S+)\s*:=\s*(.+);', line2)
+                    with open(file_name, "r", encoding="utf-8") as f:
 
-                    if line1_match and line2_match:
+                        for kind, payload in ctpjson.iter_project(f, users):
 
-                        name = line1_match.group(1)
-                        work_position = line2_match.group(1)
-                        address = line2_match.group(2)
-                        content_list.append([name, work_position, address, (".", ""), ("", "")])
-                        i += 2
+                            self.load_signal.emit(load_id, kind, payload)
 
-                    else:
+                self.load_signal.emit(load_id, "done", file_name)
 
-                        i += 1
+            except Exception as e:
 
-                print("Sequence file was processed successfully.")
+                self.load_signal.emit(load_id, "error", str(e))
 
-            else:
+        transfer_data(file_name)
 
-                print("Invalid content type! Exiting from task...")
+    def create_portfolio_tab(self):
 
-        browse_folder()
-        self.data_saved = False
+        self.portfolio_folder_label = QtWidgets.QLabel("No Folder Selected")
+        folder_button = QtWidgets.QPushButton("Select Folder")
+        folder_button.clicked.connect(self.select_portfolio_folder)
+        folder_button.setToolTip("Select a folder with saved projects to see their progress side by side.")
+        refresh_button = QtWidgets.QPushButton("Refresh")
+        refresh_button.clicked.connect(self.refresh_portfolio)
+        self.portfolio_summary_label = QtWidgets.QLabel("")
 
-    def load_data(self):
+        folder_bar = QtWidgets.QHBoxLayout()
+        folder_bar.addWidget(QtWidgets.QLabel(" FOLDER :"))
+        folder_bar.addWidget(self.portfolio_folder_label)
+        folder_bar.addStretch()
+        folder_bar.addWidget(self.portfolio_summary_label)
+        folder_bar.addWidget(folder_button)
+        folder_bar.addWidget(refresh_button)
 
-        def select_file():
+        self.portfolio_table = QtWidgets.QTableWidget(0, 7)
+        self.portfolio_table.setHorizontalHeaderLabels(["Project", "File", "IO %", "MANUAL %", "SEQUENCE %", "TOTAL %", "Last Modified"])
+        self.portfolio_table.setEditTriggers(QtWidgets.QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.portfolio_table.verticalHeader().setVisible(False)
+        self.portfolio_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        self.portfolio_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
 
-            options = QFileDialog.Option.DontUseNativeDialog
-            file_name, _ = QFileDialog.getOpenFileName(self, "Load Data", "", "JSON Files (*.json);;All Files (*)", options=options)
+        # Changed project files are picked up by polling their modification times.
+        self.portfolio_timer = QtCore.QTimer(self)
+        self.portfolio_timer.setInterval(5000)
+        self.portfolio_timer.timeout.connect(self.refresh_portfolio)
 
-            if not file_name:
+        portfolio_widget = QWidget()
+        portfolio_layout = QtWidgets.QVBoxLayout(portfolio_widget)
+        portfolio_layout.addLayout(folder_bar)
+        portfolio_layout.addWidget(self.portfolio_table)
 
-                self.status_label.setText("INFO: Load cancelled.")
+        return portfolio_widget
+
+    def show_portfolio(self):
+
+        if self.portfolio is None:
+
+            folder = self.settings.value("portfolio_folder", "")
+
+            if folder and os.path.isdir(folder):
+
+                self.set_portfolio_folder(folder)
 
                 return
 
-            self.status_label.setText("Loading data...")
+        self.refresh_portfolio()
 
-            transfer_data(file_name)
+    def select_portfolio_folder(self):
 
-        def transfer_data(file_name):
+        folder = QFileDialog.getExistingDirectory(self, "Select Portfolio Folder", self.portfolio.folder if self.portfolio else "")
+
+        if folder:
+
+            self.set_portfolio_folder(folder)
+
+        else:
+
+            self.status_label.setText("INFO: Portfolio folder selection cancelled.")
+
+    def set_portfolio_folder(self, folder):
+
+        self.portfolio = ctpportfolio.Portfolio(folder)
+        self.portfolio_busy = False
+        self.settings.setValue("portfolio_folder", folder)
+        self.portfolio_folder_label.setText(folder)
+        self.update_portfolio_view()
+        self.refresh_portfolio()
+
+    def refresh_portfolio(self):
+
+        def read_projects_thread(portfolio):
 
-            import json
+            # Results are tagged with the portfolio they belong to, a folder switch drops the older ones.
+            changed = {}
 
             try:
 
-                with open(file_name, "r", encoding="utf-8") as f:
+                changed, removed = portfolio.changes()
 
-                    data = json.load(f)
+                for file_name in removed:
 
-                self.project_name = data.get("project_name", "Untitled")
-                self.io_list = [[make_tuple(cell, str) if i in [4, 5] else cell for i, cell in enumerate(row)] for row in data.get("io_list", [])]
-                self.manual_list = [[make_tuple(cell, str) if i in [2, 3, 5, 6] else cell for i, cell in enumerate(row)] for row in data.get("manual_list", [])]
-                self.sequence_list = [[make_tuple(cell, str) if i in [3, 4] else cell for i, cell in enumerate(row)] for row in data.get("sequence_list", [])]
+                    self.portfolio_signal.emit(portfolio, "removed", file_name)
 
-                self.populate_tables()
-                self.selected_project.setText(self.project_name)
-                self.status_label.setText("INFO: Data loaded successfully.")
-                self.data_saved = True
+                if changed:
+
+                    self.status_signal.emit(f"Reading {len(changed)} project(s)...")
+
+                    # Projects are decoded in worker processes so even a few large ones don't stall the window.
+                    # Only as many are handed out as there are workers, a folder switch stops starting new ones.
+                    workers = min(len(changed), os.cpu_count() or 1)
+                    files = list(changed)
+                    futures = {}
+
+                    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+
+                        while files or futures:
+
+                            while files and len(futures) < workers and portfolio is self.portfolio:
+
+                                file_name = files.pop(0)
+                                futures[executor.submit(ctpportfolio.project_summary, file_name)] = file_name
+
+                            if not futures:
+
+                                break
+
+                            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+
+                            for future in done:
+
+                                file_name = futures.pop(future)
+
+                                try:
+
+                                    summary = future.result()
+
+                                except Exception as e:
+
+                                    summary = {"error": str(e)}
+
+                                self.portfolio_signal.emit(portfolio, "project", (file_name, changed[file_name], summary))
 
             except Exception as e:
 
-                self.status_label.setText(f"ERROR: Couldn't load the data! Please show this message to your developer -> {e}")
+                self.status_signal.emit(f"ERROR: Couldn't read the portfolio folder! Please show this message to your developer -> {e}")
 
-        def make_tuple(value, expected_type):
+            self.portfolio_signal.emit(portfolio, "done", len(changed))
 
-            if isinstance(value, list) and len(value) == 2 and isinstance(value[0], expected_type):
+        if self.portfolio is None or self.portfolio_busy:
 
-                return tuple(value)
+            return
 
-            return value
+        self.portfolio_busy = True
 
-        select_file()
+        if self.tabs.tabText(self.tabs.currentIndex()).lower() == "portfolio":
+
+            self.portfolio_timer.start()
+
+        threading.Thread(target=read_projects_thread, args=(self.portfolio,), daemon=True).start()
+
+    @QtCore.pyqtSlot(object, str, object)
+    def portfolio_progress(self, portfolio, kind, payload):
+
+        if portfolio is not self.portfolio:
+
+            return
+
+        if kind == "project":
+
+            portfolio.update(*payload)
+
+        elif kind == "removed":
+
+            portfolio.remove(payload)
+
+        elif kind == "done":
+
+            self.portfolio_busy = False
+
+            if payload:
+
+                self.status_label.setText(f"INFO: Portfolio updated, {payload} project(s) read.")
+
+            return
+
+        self.update_portfolio_view()
+
+    def update_portfolio_view(self):
+
+        # A portfolio holds a few dozen projects, the table is simply rebuilt.
+        table = self.portfolio_table
+        table.setSortingEnabled(False)
+        table.setRowCount(len(self.portfolio.summaries))
+
+        for row, file_name in enumerate(sorted(self.portfolio.summaries)):
+
+            summary = self.portfolio.summaries[file_name]
+            modified = QtCore.QDateTime.fromMSecsSinceEpoch(self.portfolio.stamps[file_name][0] // 1000000).toString("yyyy-MM-dd HH:mm")
+
+            if "counts" in summary:
+
+                counts = summary["counts"]
+                values = [summary["name"], os.path.basename(file_name)] + [ctpportfolio.tab_percent(counts, tab) for tab in ("io", "manual", "sequence")] + [ctpportfolio.total_percent(counts), modified]
+
+            else:
+
+                values = ["ERROR", os.path.basename(file_name), None, None, None, None, modified]
+
+            for col, value in enumerate(values):
+
+                item = QtWidgets.QTableWidgetItem()
+                item.setData(QtCore.Qt.ItemDataRole.DisplayRole, value)
+                item.setToolTip(summary.get("error", file_name))
+
+                if col > 1:
+
+                    item.setTextAlignment(QtCore.Qt.AlignmentFlag.AlignCenter)
+
+                table.setItem(row, col, item)
+
+        table.setSortingEnabled(True)
+
+        counts = self.portfolio.counts()
+        tab_progress = " | ".join(f"{tab.upper()} : {ctpportfolio.tab_percent(counts, tab)}%" for tab in ("io", "manual", "sequence"))
+        self.portfolio_summary_label.setText(f"{len(self.portfolio.summaries)} PROJECT(S) | {tab_progress} | TOTAL : {ctpportfolio.total_percent(counts)}%     ")
+
+        if self.tabs.tabText(self.tabs.currentIndex()).lower() == "portfolio":
+
+            self.update_progress_bar("portfolio")
+
+    @QtCore.pyqtSlot(int, str, object)
+    def load_progress(self, load_id, kind, payload):
+
+        # Batches of a load whose rows were replaced in the meantime are dropped.
+        if load_id != self.load_id:
+
+            return
+
+        if kind == "project_name":
+
+            self.project_name = payload
+            self.selected_project.setText(self.project_name)
+
+        elif kind in self.progress:
+
+            rows = self.tab_rows(kind)
+            rows.extend(payload)
+            self.progress[kind].add(kind, payload)
+
+            if kind not in self.dirty_tabs:
+
+                self.models[kind].rows_appended()
+
+            self.status_label.setText(f"Loading data... ({len(self.io_list) + len(self.manual_list) + len(self.sequence_list)} rows)")
+
+        elif kind in ("done", "read"):
+
+            # "done" ends a loaded project (payload is its file), "read" a new project (payload tells if every export was found).
+            self.indexes = {}
+            self.update_filter_choices()
+            self.apply_filters()
+            self.update_progress_bar(self.tabs.tabText(self.tabs.currentIndex()).lower())
+            self.update_overview_progress()
+
+            if kind == "read":
+
+                # A failed read was already reported by read_files.
+                if self.read and payload:
+
+                    self.status_label.setText("INFO: New project is created successfully.")
+
+                elif self.read:
+
+                    self.status_label.setText("WARNING: Some files were not found. Some tabs will be empty. Please try again and make sure that you have selected right location to use this program efficiently.")
+
+                return
+
+            # Saving back to an opened project store only writes the cells edited since the load started.
+            if payload.lower().endswith(ctpstore.PROJECT_EXTENSION):
+
+                self.store = ctpstore.ProjectStore(payload)
+
+            self.status_label.setText("INFO: Data loaded successfully.")
+            self.data_saved = self.edit_generation == self.load_generation
+            self.open_journal(payload)
+            self.recover_journal()
+
+        elif kind == "error":
+
+            self.status_label.setText(f"ERROR: Couldn't load the data! Please show this message to your developer -> {payload}")
 
     def save_data(self):
 
@@ -397,7 +709,8 @@ class MainWindow(QtWidgets.QMainWindow):
             options = QFileDialog.Option.DontUseNativeDialog
             default_dir = self.selected_project.text()
             default_file_name = self.project_name + ".json"
-            file_name, _ = QFileDialog.getSaveFileName(self, "Save Data", os.path.join(default_dir, default_file_name), "JSON Files (*.json);;All Files (*)", options=options)
+            default_path = self.store.path if self.store else os.path.join(default_dir, default_file_name)
+            file_name, _ = QFileDialog.getSaveFileName(self, "Save Data", default_path, f"JSON Files (*.json);;CTP Project (*{ctpstore.PROJECT_EXTENSION});;CTP Snapshot (*{ctpsnapshot.SNAPSHOT_EXTENSION});;All Files (*)", options=options)
 
             if not file_name:
 
@@ -409,207 +722,242 @@ class MainWindow(QtWidgets.QMainWindow):
             name_without_ext = os.path.splitext(base_name)[0]
             self.project_name = name_without_ext
 
-            data = {"project_name": self.project_name, "io_list": self.io_list, "manual_list": self.manual_list, "sequence_list": self.sequence_list}
-            threading.Thread(target=save_json, args=(file_name, data,), daemon=True).start()
+            self.start_save(file_name)
+
+        if self.selected_project.text() == "No Project Selected":
+
+            self.status_label.setText("WARNING: Please select a project first.")
+
+            return
+
+        else:
 
-        def save_json(file_name, data):
+            self.commit_open_editors()
+            prepare_data()
+
+    def start_save(self, file_name, message="INFO: Data saved successfully."):
 
-            import json
+        def save_store(store, project_name, lists, users, cells, journal, generation):
 
             try:
 
                 self.status_signal.emit("Saving data...")
 
-                with open(file_name, "w", encoding="utf-8") as f:
+                if cells is None:
 
-                    json.dump(data, f, indent=4)
+                    store.write_project(project_name, lists, users)
 
-                self.status_signal.emit("INFO: Data saved successfully.")
+                else:
+
+                    store.write_cells(project_name, lists, users, cells)
+
+                saved(journal, generation)
 
             except Exception as e:
 
-                self.status_signal.emit(f"ERROR: Couldn't save the data! Please show this message to your developer -> {e}")
+                failed(e)
 
-            self.data_saved = True
+        def save_json(file_name, project_name, io_list, manual_list, sequence_list, users, journal, generation):
 
-        if self.selected_project.text() == "No Project Selected":
+            try:
 
-            self.status_label.setText("WARNING: Please select a project first.")
+                self.status_signal.emit("Saving data...")
 
-            return
+                with ctpmodel.replace_file(file_name, "w", encoding="utf-8") as f:
 
-        else:
+                    ctpjson.write_project(f, project_name, {"io": io_list, "manual": manual_list, "sequence": sequence_list}, users)
 
-            prepare_data()
+                saved(journal, generation)
 
-    def export_data(self):
+            except Exception as e:
 
-        def select_location():
+                failed(e)
 
-            options = QFileDialog.Option.DontUseNativeDialog
-            default_file_name = self.project_name + ".xlsx"
-            file_name, _ = QFileDialog.getSaveFileName(self, "Export", os.path.join(self.selected_project.text(), default_file_name), "Excel Files (*.xlsx);;All Files (*)", options=options)
+        def save_snapshot(file_name, project_name, lists, users, journal, generation):
 
-            if not file_name:
+            try:
 
-                self.status_label.setText("INFO: Export cancelled.")
+                self.status_signal.emit("Saving data...")
 
-                return
+                ctpsnapshot.write_snapshot(file_name, project_name, lists, users)
+                saved(journal, generation)
 
-            else:
+            except Exception as e:
 
-                prepare_data(file_name)
+                failed(e)
 
-        def prepare_data(file_name):
+        def saved(journal, generation):
 
-            io_cleaned = clean_data_list(self.io_list)
-            io_progress = self.calculate_progress("io")[1]
-            manual_cleaned = clean_data_list(self.manual_list)
-            manual_progress = self.calculate_progress("manual")[1]
-            sequence_cleaned = clean_data_list(self.sequence_list)
-            sequence_progress = self.calculate_progress("sequence")[1]
-            total_progress = self.calculate_total_progress()
+            # The snapshot now holds every journaled edit made before the save started.
+            if journal:
 
-            threading.Thread(target=transfer_data, args=(file_name, io_cleaned, io_progress, manual_cleaned, manual_progress, sequence_cleaned, sequence_progress, total_progress,), daemon=True).start()
+                journal.remove_saved()
 
-        def clean_data_list(data_list):
+            self.saved_signal.emit(True, message, generation)
 
-            cleaned = []
+        def failed(e):
 
-            for row in data_list:
+            # The project stays unsaved and the rotated journal keeps every edit until a save succeeds.
+            self.saved_signal.emit(False, f"ERROR: Couldn't save the data! Please show this message to your developer -> {e}", generation)
 
-                cleaned_row = []
+        # One save at a time: a save requested meanwhile (a click or a compaction) runs when this one has finished.
+        if self.saving:
 
-                for item in row:
+            self.queued_save = (file_name, message)
+            self.status_label.setText("INFO: Another save is still running, this one follows when it has finished.")
 
-                    if isinstance(item, (list, tuple)):
+            return
 
-                        if isinstance(item[0], str) and item[0] in ["X", "OK", "N/A"]:
+        self.saving = True
+        journal = self.journal
+        # Edits made after the rotate are only in the new journal, save_finished compares against this.
+        generation = self.edit_generation
 
-                            if item[0] == "X":
+        if journal:
 
-                                cleaned_row.append("X")
+            journal.rotate()
 
-                            elif item[0] == "OK":
+        if file_name != self.project_file:
 
-                                cleaned_row.append("OK")
+            # Whatever an older session left for the target file is overwritten by this snapshot.
+            ctpjournal.EditJournal(ctpjournal.journal_path(file_name)).clear()
 
-                            else:
+        self.open_journal(file_name)
 
-                                cleaned_row.append("N/A")
+        if file_name.lower().endswith(ctpstore.PROJECT_EXTENSION):
 
-                        elif isinstance(item[0], str):
+            # Saving back to the opened project only writes the edited cells, anything else is a full write.
+            if self.store and self.store.path == file_name and self.dirty_cells is not None:
 
-                            if item[0].strip() == ".":
+                cells = self.dirty_cells
 
-                                cleaned_row.append("X")
+            else:
 
-                            elif item[0].strip() == "":
+                cells = None
 
-                                cleaned_row.append("")
+            self.store = ctpstore.ProjectStore(file_name)
+            self.dirty_cells = {"io": set(), "manual": set(), "sequence": set()}
 
-                            elif item[0].strip().startswith(("=", "+", "-")):
+            threading.Thread(target=save_store, args=(self.store, self.project_name, {"io": self.io_list, "manual": self.manual_list, "sequence": self.sequence_list}, self.users, cells, journal, generation,), daemon=True).start()
 
-                                cleaned_row.append(" " + item[0])
+        elif file_name.lower().endswith(ctpsnapshot.SNAPSHOT_EXTENSION):
 
-                            else:
+            threading.Thread(target=save_snapshot, args=(file_name, self.project_name, {"io": self.io_list, "manual": self.manual_list, "sequence": self.sequence_list}, self.users, journal, generation,), daemon=True).start()
 
-                                cleaned_row.append(item[0])
+        else:
 
-                    elif isinstance(item, str):
+            threading.Thread(target=save_json, args=(file_name, self.project_name, self.io_list, self.manual_list, self.sequence_list, self.users, journal, generation,), daemon=True).start()
 
-                        if item.strip().startswith(("=", "+", "-")):
+    @QtCore.pyqtSlot(bool, str, int)
+    def save_finished(self, ok, message, generation):
 
-                            cleaned_row.append(" " + item)
+        self.saving = False
+        self.status_label.setText(message)
 
-                        else:
+        if ok:
 
-                            cleaned_row.append(item)
+            # Anything edited while the save was running still has to be saved before the window closes.
+            self.data_saved = generation == self.edit_generation
 
-                    else:
+        else:
 
-                        cleaned_row.append(item)
+            # The next save to a project store rewrites the whole project instead of trusting a half-written cell list.
+            self.dirty_cells = None
 
-                cleaned.append(cleaned_row)
+        if self.queued_save:
 
-            return cleaned
+            file_name, message = self.queued_save
+            self.queued_save = None
+            self.start_save(file_name, message)
 
-        def transfer_data(file_name, io_cleaned, io_progress, manual_cleaned, manual_progress, sequence_cleaned, sequence_progress, total_progress):
+    def export_data(self):
 
-            import pandas as pd
-            from openpyxl import load_workbook
-            from openpyxl.styles import Alignment
+        def select_location():
 
-            try:
+            options = QFileDialog.Option.DontUseNativeDialog
+            default_file_name = self.project_name + ".xlsx"
+            extensions = ctpexport.available_formats()
+            # Filter text -> the formats it writes, "All Formats" writes every one of them next to each other.
+            file_filters = {f"{ctpexport.FORMAT_NAMES[extension]} (*{extension})": [extension] for extension in extensions}
+            file_filters[f"All Formats ({' '.join('*' + extension for extension in extensions)})"] = extensions
+            file_name, selected_filter = QFileDialog.getSaveFileName(self, "Export", os.path.join(self.selected_project.text(), default_file_name), ";;".join(file_filters), options=options)
 
-                self.status_signal.emit("Exporting data...")
+            if not file_name:
+
+                self.status_label.setText("INFO: Export cancelled.")
+
+                return
+
+            else:
 
-                with pd.ExcelWriter(file_name, engine="openpyxl") as writer:
+                prepare_data(export_targets(file_name, file_filters.get(selected_filter, [".xlsx"])))
 
-                    df_io = pd.DataFrame(io_cleaned, columns=["Module", "BMK", "Address", "Description", "Check", "Comment"])
-                    df_io.to_excel(writer, sheet_name="IO", index=False)
-                    df_manual = pd.DataFrame(manual_cleaned, columns=["Name", "BAS", "Check", "Comment1", "WRK", "Check", "Comment2"])
-                    df_manual.to_excel(writer, sheet_name="MANUAL", index=False)
-                    df_seq = pd.DataFrame(sequence_cleaned, columns=["Name", "Work Position", "Address", "Check", "Comment"])
-                    df_seq.to_excel(writer, sheet_name="SEQUENCE", index=False)
+        def export_targets(file_name, extensions):
 
-                wb = load_workbook(file_name)
+            # (extension, file name) pairs, the selected file type decides the extension.
+            root, extension = os.path.splitext(file_name)
 
-                for sheet_name in ["IO", "MANUAL", "SEQUENCE"]:
+            if extension.lower() not in ctpexport.EXPORT_FORMATS:
 
-                    ws = wb[sheet_name]
+                root = file_name
 
-                    for col in ws.columns:
+            return [(extension, root + extension) for extension in extensions]
 
-                        max_length = 0
-                        column = col[0].column_letter
+        def prepare_data(targets):
 
-                        for cell in col:
+            sheets = {}
 
-                            cell.alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
+            for _, content_type, _ in ctpexport.SHEETS:
 
-                            try:
+                sheets[content_type] = (ctpexport.row_columns(content_type, self.tab_rows(content_type)), self.calculate_progress(content_type)[1])
 
-                                if len(str(cell.value)) > max_length:
+            total_progress = self.calculate_total_progress()
 
-                                    max_length = len(str(cell.value)) + 1
+            threading.Thread(target=transfer_data, args=(targets, self.project_name, sheets, total_progress,), daemon=True).start()
 
-                            except:
+        def transfer_data(targets, project_name, sheets, total_progress):
 
-                                pass
+            try:
 
-                        adjusted_width = (max_length + 2)
-                        ws.column_dimensions[column].width = adjusted_width
+                self.status_signal.emit("Exporting data...")
 
-                ws_io = wb["IO"]
-                set_progress_cell(ws_io, 1, 7, f"IO Progress: {io_progress}%")
-                ws_total = wb["IO"]
-                set_progress_cell(ws_total, 1, 8, f"TOTAL Progress: {total_progress}%")
-                ws_manual = wb["MANUAL"]
-                set_progress_cell(ws_manual, 1, 8, f"MANUAL Progress: {manual_progress}%")
-                ws_seq = wb["SEQUENCE"]
-                set_progress_cell(ws_seq, 1, 6, f"SEQUENCE Progress: {sequence_progress}%")
+                sheets = ctpexport.clean_sheets(sheets)
 
-                wb.save(file_name)
-                self.status_signal.emit("INFO: Data exported successfully.")
+                if len(targets) == 1:
 
-            except Exception as e:
+                    ctpexport.export_file(*targets[0], project_name, sheets, total_progress)
+                    self.status_signal.emit("INFO: Data exported successfully.")
 
-                self.status_signal.emit(f"ERROR: Couldn't export the data! Please show this message to your developer -> {e}")
+                    return
 
-        def set_progress_cell(ws, row, col, progress_text):
+                # Every format is written by its own process, the .xlsx one takes the longest by far.
+                failed = []
 
-            from openpyxl.styles import Alignment, Border, Font, Side
+                with ProcessPoolExecutor(max_workers=len(targets), mp_context=multiprocessing.get_context("spawn")) as executor:
 
-            cell = ws.cell(row=row, column=col)
-            cell.value = progress_text
-            cell.alignment = Alignment(horizontal='center', vertical='center')
-            cell.font = Font(bold=True)
-            thin_border = Border(left=Side(style='thin'), right=Side(style='thin'), top=Side(style='thin'), bottom=Side(style='thin'))
-            cell.border = thin_border
-            column_letter = cell.column_letter
-            ws.column_dimensions[column_letter].width = len(progress_text) + 5
-            ws.row_dimensions[row].height = 20
+                    futures = {executor.submit(ctpexport.export_file, extension, file_name, project_name, sheets, total_progress): extension for extension, file_name in targets}
+
+                    for done, future in enumerate(as_completed(futures), 1):
+
+                        try:
+
+                            self.status_signal.emit(f"Exporting data... ({done}/{len(targets)}) {os.path.basename(future.result())}")
+
+                        except Exception as e:
+
+                            failed.append(f"{futures[future]} -> {e}")
+
+                if failed:
+
+                    self.status_signal.emit("WARNING: Some formats couldn't be exported! " + " | ".join(failed))
+
+                else:
+
+                    self.status_signal.emit("INFO: Data exported successfully.")
+
+            except Exception as e:
+
+                self.status_signal.emit(f"ERROR: Couldn't export the data! Please show this message to your developer -> {e}")
 
         if not self.io_list and not self.manual_list and not self.sequence_list:
 
@@ -619,6 +967,7 @@ class MainWindow(QtWidgets.QMainWindow):
 
         else:
 
+            self.commit_open_editors()
             select_location()
 
     def change_theme(self, theme_name):
@@ -627,8 +976,6 @@ class MainWindow(QtWidgets.QMainWindow):
 
             app = QtWidgets.QApplication.instance()
 
-            self.theme_change = True
-
             if theme_name == "White":
 
                 set_white_palette(app)
@@ -660,9 +1007,6 @@ class MainWindow(QtWidgets.QMainWindow):
             settings = QtCore.QSettings("BOSCH", "CTP")
             settings.setValue("theme", theme_name)
 
-            self.populate_tables()
-            self.theme_change = False
-
         def set_white_palette(app):
 
             app.setStyle("Fusion")
@@ -812,24 +1156,18 @@ class MainWindow(QtWidgets.QMainWindow):
 
         apply_theme()
 
-    def get_alternate_row_colors(self):
+    def create_table(self, model, stretch_cols=[]):
 
-        palette = QtWidgets.QApplication.instance().palette()
-        base_color = palette.color(QtGui.QPalette.ColorRole.Base)
-        alternate_base_color = palette.color(QtGui.QPalette.ColorRole.AlternateBase)
-
-        return base_color, alternate_base_color
-
-    def create_table(self, headers, stretch_cols=[]):
-
-        table = QtWidgets.QTableWidget()
-        table.setColumnCount(len(headers))
-        table.setHorizontalHeaderLabels(headers)
+        table = QtWidgets.QTableView()
+        table.setModel(model)
+        table.setItemDelegate(ctpview.CellDelegate(table))
         table.horizontalHeader().setStretchLastSection(True)
-        table.setEditTriggers(QtWidgets.QAbstractItemView.EditTrigger.NoEditTriggers)
+        table.setEditTriggers(QtWidgets.QAbstractItemView.EditTrigger.CurrentChanged | QtWidgets.QAbstractItemView.EditTrigger.SelectedClicked | QtWidgets.QAbstractItemView.EditTrigger.EditKeyPressed)
         header = table.horizontalHeader()
+        # Fit columns to the visible rows only, otherwise every relayout (e.g. a theme switch) samples 1000 rows through the model.
+        header.setResizeContentsPrecision(0)
 
-        for i in range(len(headers)):
+        for i in range(model.columnCount()):
 
             if i in stretch_cols:
 
@@ -839,186 +1177,408 @@ class MainWindow(QtWidgets.QMainWindow):
 
                 header.setSectionResizeMode(i, QHeaderView.ResizeMode.ResizeToContents)
 
+        table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
         table.verticalHeader().setDefaultSectionSize(40)
         table.verticalHeader().setMinimumWidth(32)
         table.verticalHeader().setMaximumWidth(32)
         table.setAlternatingRowColors(True)
+        table.setContextMenuPolicy(QtCore.Qt.ContextMenuPolicy.CustomContextMenu)
+        table.customContextMenuRequested.connect(lambda pos: self.show_bulk_menu(table, model, pos))
 
         return table
 
-    @QtCore.pyqtSlot()
-    def populate_tables(self):
+    def show_bulk_menu(self, table, model, pos):
+
+        def selected_cells():
+
+            # Selected check cells are set as they are, rows selected elsewhere get all of their check cells set.
+            indexes = table.selectionModel().selectedIndexes()
+            cols = sorted({index.column() for index in indexes if model.is_check(index.column())})
+            positions = sorted({model.source_row(index.row()) for index in indexes})
+
+            return positions, cols or sorted(model.row_class.CHECK_COLUMNS)
+
+        def set_selection(text):
+
+            positions, cols = selected_cells()
+
+            self.bulk_set_status(model.tab, positions, cols, text)
+
+        def set_shown_rows(text):
+
+            positions = model.shown_rows()
+            cols = sorted(model.row_class.CHECK_COLUMNS)
+            reply = QMessageBox.question(self, 'Set All Shown Rows?', f"Set {len(positions) * len(cols)} check cell(s) of the shown {model.tab.upper()} rows to {text}?", QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+
+            if reply == QMessageBox.StandardButton.Yes:
+
+                self.bulk_set_status(model.tab, positions, cols, text)
 
-        def populate_table(table, data_list, special_cols, tab_name):
+        menu = QtWidgets.QMenu(self)
 
-            table.setRowCount(len(data_list))
-            base_color, alternate_base_color = self.get_alternate_row_colors()
+        for text in ctpview.STATUS_CHOICES:
 
-            for row_idx, row_data in enumerate(data_list):
+            action = menu.addAction(f"Set Selection to {text}")
+            action.setEnabled(table.selectionModel().hasSelection())
+            action.triggered.connect(lambda checked, text=text: set_selection(text))
 
-                table.setRowHeight(row_idx, 40)
+        menu.addSeparator()
 
-                for col_idx, value in enumerate(row_data):
+        for text in ctpview.STATUS_CHOICES:
 
-                    if col_idx in special_cols:
+            action = menu.addAction(f"Set All Shown Rows to {text}")
+            action.setEnabled(model.total() > 0)
+            action.triggered.connect(lambda checked, text=text: set_shown_rows(text))
 
-                        if (tab_name == "io" and col_idx == 4) or (tab_name == "manual" and (col_idx == 2 or col_idx == 5)) or (tab_name == "sequence" and col_idx == 3):
+        menu.exec(table.viewport().mapToGlobal(pos))
 
-                            val_str, user = value
-                            widget = QWidget()
-                            layout = QHBoxLayout()
-                            layout.setAlignment(QtCore.Qt.AlignmentFlag.AlignCenter)
-                            cb = QtWidgets.QComboBox()
-                            cb.addItems(["X", "OK", "N/A"])
-                            index = cb.findText(val_str)
+    @QtCore.pyqtSlot()
+    def populate_tables(self):
 
-                            if index != -1:
+        tab_name = self.tabs.tabText(self.tabs.currentIndex()).lower()
 
-                                cb.setCurrentIndex(index)
+        # Only the visible tab is filled now, the others follow in on_tab_changed when they are first shown.
+        self.recount_progress()
+        self.dirty_tabs.update(self.progress)
+        self.indexes = {}
+        # Row positions changed, the next save to a project store has to write every row and journal records
+        # can't be replayed onto the saved file anymore, journaling resumes with the next load or save.
+        self.dirty_cells = None
+        self.close_journal()
+        self.edit_generation += 1
+        self.load_id += 1
+        self.update_filter_choices()
+        self.populate_tab(tab_name)
+        self.apply_filters()
+        self.selected_project.setText(self.project_name)
 
-                            else:
+        if not tab_name == -1:
 
-                                cb.setCurrentIndex(0)
+            self.update_progress_bar(tab_name)
 
-                            cb.setToolTip(f"Last modified by: {user}" if user else "No modifications yet.")
-                            cb.currentTextChanged.connect(lambda text, r=row_idx, c=col_idx, t=tab_name: self.combobox_changed(t, r, c, text))
-                            layout.addWidget(cb)
-                            widget.setLayout(layout)
-                            table.setCellWidget(row_idx, col_idx, widget)
+        self.update_overview_progress()
 
-                        elif isinstance(value, tuple) and isinstance(value[0], str):
+    def populate_tab(self, tab):
 
-                            text, user = value
-                            le = QLineEdit()
-                            le.setText(text)
-                            le.setToolTip(f"Last modified by: {user}" if user else "No modifications yet.")
-                            le.textChanged.connect(lambda text, r=row_idx, c=col_idx, t=tab_name: self.comment_changed(t, r, c, text))
+        if tab not in self.dirty_tabs:
 
-                            if row_idx % 2 == 0:
+            return
 
-                                le.setStyleSheet(f"QLineEdit {{ background-color: {base_color.name()}; }}")
+        if tab == "io":
 
-                            else:
+            self.io_model.set_rows(self.io_list)
 
-                                le.setStyleSheet(f"QLineEdit {{ background-color: {alternate_base_color.name()}; }}")
+        elif tab == "manual":
 
-                            table.setCellWidget(row_idx, col_idx, le)
+            self.manual_model.set_rows(self.manual_list)
 
-                        else:
+        elif tab == "sequence":
 
-                            le = QLineEdit()
-                            le.setText(value)
-                            le.textChanged.connect(lambda text, r=row_idx, c=col_idx, t=tab_name: self.comment_changed(t, r, c, text))
+            self.sequence_model.set_rows(self.sequence_list)
 
-                            if row_idx % 2 == 0:
+        self.dirty_tabs.discard(tab)
 
-                                le.setStyleSheet(f"QLineEdit {{ background-color: {base_color.name()}; }}")
+    def tab_rows(self, tab):
 
-                            else:
+        return {"io": self.io_list, "manual": self.manual_list, "sequence": self.sequence_list}[tab]
 
-                                le.setStyleSheet(f"QLineEdit {{ background-color: {alternate_base_color.name()}; }}")
+    def row_index(self, tab):
 
-                            table.setCellWidget(row_idx, col_idx, le)
+        # Search indexes are built the first time a tab is filtered and replaced together with its rows.
+        if tab not in self.indexes:
 
-                    else:
+            self.indexes[tab] = ctpmodel.RowIndex(tab, self.tab_rows(tab))
 
-                        item = QTableWidgetItem(str(value))
-                        item.setTextAlignment(QtCore.Qt.AlignmentFlag.AlignCenter)
-                        table.setItem(row_idx, col_idx, item)
+        return self.indexes[tab]
 
-            self.update_progress_bar(tab_name)
+    def update_filter_choices(self):
 
-        tab_name = self.tabs.tabText(self.tabs.currentIndex()).lower()
+        def set_choices(combobox, choices):
 
-        populate_table(self.io_table, self.io_list, [4, 5], "io")
-        populate_table(self.manual_table, self.manual_list, [2, 3, 5, 6], "manual")
-        populate_table(self.sequence_table, self.sequence_list, [3, 4], "sequence")
+            current = combobox.currentText()
 
-        if self.read:
+            combobox.blockSignals(True)
+            combobox.clear()
+            combobox.addItems(choices)
+            combobox.setCurrentIndex(max(0, combobox.findText(current)))
+            combobox.blockSignals(False)
 
-            if self.missing:
+        set_choices(self.module_filter, ["All Modules"] + sorted({row.module for row in self.io_list}))
+        set_choices(self.user_filter, ["All Users"] + self.users.names[1:])
 
-                self.status_label.setText("WARNING: Some files were not found. Some tabs will be empty. Please try again and make sure that you have selected right location to use this program efficiently.")
+    @QtCore.pyqtSlot()
+    def apply_filters(self):
 
-            elif not self.missing and not self.theme_change:
+        tab = self.tabs.tabText(self.tabs.currentIndex()).lower()
 
-                self.status_label.setText("INFO: New project is created successfully.")
+        self.module_filter.setEnabled(tab == "io")
 
-        self.selected_project.setText(self.project_name)
+        if tab not in self.models:
 
-        if not tab_name == -1:
+            return
 
-            self.update_progress_bar(tab_name)
+        text = self.search_box.text()
+        module = self.module_filter.currentText() if tab == "io" and self.module_filter.currentIndex() > 0 else None
+        statuses = ctpview.STATUS_FILTERS.get(self.status_filter.currentText())
+        user_id = self.users.ids.get(self.user_filter.currentText(), -1) if self.user_filter.currentIndex() > 0 else None
 
-        self.update_overview_progress()
+        if not text.strip() and module is None and statuses is None and user_id is None:
 
-    def combobox_changed(self, tab, row, col, text):
+            self.models[tab].set_filter(None)
+
+            return
+
+        positions = self.row_index(tab).search(text, module, statuses, user_id)
 
-        value = (text, self.user_name)
+        self.models[tab].set_filter(positions)
+        self.status_label.setText(f"INFO: {len(positions)} of {len(self.models[tab].rows)} {tab.upper()} rows match the filters.")
+
+    def combobox_changed(self, tab, row, col, text):
 
         if tab == "io":
 
-            self.io_list[row][col] = value
-            table = self.io_table
+            rows = self.io_list
+            model = self.io_model
 
         elif tab == "manual":
 
-            self.manual_list[row][col] = value
-            table = self.manual_table
+            rows = self.manual_list
+            model = self.manual_model
 
         elif tab == "sequence":
 
-            self.sequence_list[row][col] = value
-            table = self.sequence_table
+            rows = self.sequence_list
+            model = self.sequence_model
+
+        status = ctpmodel.STATUS_VALUES[text]
+        self.progress[tab].update(rows[row].check(col)[0], status)
+        rows[row].set_check(col, status, self.intern_user())
+        self.mark_dirty(tab, [(row, col)])
+
+        if tab in self.indexes:
+
+            self.indexes[tab].update_row(row)
+
+        model.cell_changed(row, col)
+
+        self.update_progress_bar(tab)
+        self.update_overview_progress()
+        self.data_saved = False
+
+    def bulk_set_status(self, tab, positions, cols, text):
 
-        if table:
+        # One pass over the rows, then a single counter update, repaint and progress refresh.
+        rows = self.tab_rows(tab)
+        status = ctpmodel.STATUS_VALUES[text]
+        user_id = self.intern_user()
+        old_statuses = []
+        cells = []
+        index = self.indexes.get(tab)
 
-            cell_widget = table.cellWidget(row, col)
+        for position in positions:
 
-            if cell_widget:
+            row = rows[position]
 
-                combobox = cell_widget.findChild(QtWidgets.QComboBox)
+            for col in cols:
 
-                if combobox:
-                    combobox.setToolTip(f"Last modified by: {self.user_name}")
+                old_statuses.append(row.check(col)[0])
+                row.set_check(col, status, user_id)
+                cells.append((position, col))
+
+            if index:
+
+                index.update_row(position)
+
+        # Journaled once after the loop: one write for the whole edit, and a compaction it triggers
+        # never snapshots a half-applied bulk edit.
+        self.mark_dirty(tab, cells)
+        self.progress[tab].update_many(old_statuses, status)
+        self.models[tab].rows_changed()
 
         self.update_progress_bar(tab)
         self.update_overview_progress()
         self.data_saved = False
+        self.status_label.setText(f"INFO: {len(old_statuses)} {tab.upper()} check cell(s) set to {text}.")
 
     def comment_changed(self, tab, row, col, text):
 
-        value = (text, self.user_name)
+        user_id = self.intern_user()
 
         if tab == "io":
 
-            self.io_list[row][col] = value
-            table = self.io_table
+            self.io_list[row].set_comment(col, text, user_id)
+            model = self.io_model
 
         elif tab == "manual":
 
-            self.manual_list[row][col] = value
-            table = self.manual_table
+            self.manual_list[row].set_comment(col, text, user_id)
+            model = self.manual_model
 
         elif tab == "sequence":
 
-            self.sequence_list[row][col] = value
-            table = self.sequence_table
+            self.sequence_list[row].set_comment(col, text, user_id)
+            model = self.sequence_model
+
+        self.mark_dirty(tab, [(row, col)])
+
+        if tab in self.indexes:
+
+            self.indexes[tab].update_row(row)
+
+        model.cell_changed(row, col)
+
+        self.data_saved = False
+
+    def mark_dirty(self, tab, cells):
+
+        self.edit_generation += 1
 
-        if table:
+        # Cells edited since the last save, only these are written back to an opened project store.
+        if self.dirty_cells is not None:
 
-            line_edit = table.cellWidget(row, col)
+            self.dirty_cells[tab].update(cells)
 
-            if line_edit:
-                line_edit.setToolTip(f"Last modified by: {self.user_name}")
+        if self.journal:
 
+            try:
+
+                self.journal.append(ctpjournal.cell_records(tab, self.tab_rows(tab), cells, self.users))
+
+            except Exception as e:
+
+                print(f"Edit journal couldn't be written -> {e}")
+
+            # A long journal is folded into the project file in the background, which also empties it.
+            # While a save runs the compaction is queued behind it, unless a queued save folds the journal in anyway.
+            if self.journal.size >= ctpjournal.COMPACT_SIZE and not self.queued_save:
+
+                self.start_save(self.project_file, "INFO: Edit journal was folded into the project file.")
+
+    def open_journal(self, file_name):
+
+        if self.journal and self.journal.path == ctpjournal.journal_path(file_name):
+
+            return
+
+        self.close_journal()
+        self.project_file = file_name
+        self.journal = ctpjournal.EditJournal(ctpjournal.journal_path(file_name))
+        self.settings.setValue("last_project", file_name)
+
+    def close_journal(self, discard=False):
+
+        if self.journal:
+
+            if discard:
+
+                self.journal.clear()
+
+            else:
+
+                self.journal.close()
+
+        self.journal = None
+        self.project_file = None
+
+    def recover_journal(self):
+
+        if not self.journal or not self.journal.pending():
+
+            return
+
+        records = self.journal.read_records()
+
+        if not records:
+
+            self.journal.clear()
+
+            return
+
+        reply = QMessageBox.question(self, 'Recover Unsaved Changes?', f"WARNING: {len(records)} unsaved change(s) from an earlier session were found for this project. Do you want to recover them?", QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+
+        if reply != QMessageBox.StandardButton.Yes:
+
+            self.journal.clear()
+
+            return
+
+        # The records stay in the journal until the next save, so a second crash doesn't lose them either.
+        touched = ctpjournal.replay(records, {"io": self.io_list, "manual": self.manual_list, "sequence": self.sequence_list}, self.users)
+
+        if self.dirty_cells is not None:
+
+            for tab, cells in touched.items():
+
+                self.dirty_cells[tab].update(cells)
+
+        self.recount_progress()
+        self.indexes = {}
+        self.update_filter_choices()
+
+        for model in self.models.values():
+
+            model.rows_changed()
+
+        self.update_progress_bar(self.tabs.tabText(self.tabs.currentIndex()).lower())
+        self.update_overview_progress()
+        self.edit_generation += 1
         self.data_saved = False
+        self.status_label.setText(f"INFO: {sum(len(cells) for cells in touched.values())} unsaved change(s) were recovered.")
+
+    def recover_last_project(self):
+
+        # A journal left behind by the last project means the app wasn't closed cleanly.
+        last_project = self.settings.value("last_project", "")
+
+        if last_project and os.path.exists(last_project) and ctpjournal.EditJournal(ctpjournal.journal_path(last_project)).pending():
+
+            self.status_label.setText("Loading data...")
+            self.open_project(last_project)
+
+    def commit_open_editors(self):
+
+        # Comments are committed once when their editor closes, one that is still open is committed here
+        # so a save, export or re-import never misses the text being typed.
+        for table in (self.io_table, self.manual_table, self.sequence_table):
+
+            editor = table.indexWidget(table.currentIndex())
+
+            if editor:
+
+                table.commitData(editor)
+
+    def intern_user(self):
+
+        # The first edit of a new user also makes them selectable in the "MODIFIED BY" filter.
+        if self.user_name not in self.users.ids:
+
+            self.user_filter.addItem(self.user_name)
+
+        return self.users.intern(self.user_name)
 
     def on_tab_changed(self, index):
 
         tab_name = self.tabs.tabText(index).lower()
 
-        self.update_progress_bar(tab_name)
+        self.populate_tab(tab_name)
+        self.apply_filters()
+
+        # The portfolio folder is only watched while its tab is shown.
+        if tab_name == "portfolio":
+
+            self.show_portfolio()
+
+        else:
+
+            self.portfolio_timer.stop()
+
+        if tab_name in self.models and self.models[tab_name].filling():
+
+            self.fill_progress_changed(tab_name, self.models[tab_name].loaded, self.models[tab_name].total())
+
+        else:
+
+            self.update_progress_bar(tab_name)
 
     def create_progress_display(self, tab_name, parent_layout):
 
@@ -1060,61 +1620,63 @@ class MainWindow(QtWidgets.QMainWindow):
 
         update_progress_label_widths()
 
+    def recount_progress(self):
+
+        self.progress["io"].reset("io", self.io_list)
+        self.progress["manual"].reset("manual", self.manual_list)
+        self.progress["sequence"].reset("sequence", self.sequence_list)
+
     def calculate_progress(self, tab):
 
-        value = []
+        if tab not in self.progress:
 
-        if tab == "io":
+            return 0
 
-            total = len(self.io_list)
-            total -= sum((isinstance(r[4], tuple) and r[4][0] == "N/A") for r in self.io_list)
-            checked = sum(1 for r in self.io_list if isinstance(r[4], tuple) and r[4][0] == "OK")
-            value.append("IO")
+        return [tab.upper(), self.progress[tab].percent()]
 
-        elif tab == "manual":
+    def calculate_total_progress(self):
 
-            total = 2 * len(self.manual_list)
-            total -= sum((isinstance(r[2], tuple) and r[2][0] == "N/A") + (isinstance(r[5], tuple) and r[5][0] == "N/A") for r in self.manual_list)
-            checked = sum((isinstance(r[2], tuple) and r[2][0] == "OK") + (isinstance(r[5], tuple) and r[5][0] == "OK") for r in self.manual_list)
-            value.append("MANUAL")
+        cells = sum(counter.cells for counter in self.progress.values())
+        checked = sum(counter.ok for counter in self.progress.values())
+        not_applicable = sum(counter.na for counter in self.progress.values())
 
-        elif tab == "sequence":
+        return ctpmodel.progress_percent(cells, checked, not_applicable)
 
-            total = len(self.sequence_list)
-            total -= sum((isinstance(r[3], tuple) and r[3][0] == "N/A") for r in self.sequence_list)
-            checked = sum(1 for r in self.sequence_list if isinstance(r[3], tuple) and r[3][0] == "OK")
-            value.append("SEQUENCE")
+    @QtCore.pyqtSlot(str, int, int)
+    def fill_progress_changed(self, tab, loaded, total):
 
-        else:
+        self.cancel_fill_button.setVisible(any(model.filling() for model in self.models.values()))
 
-            value.append("")
+        if tab != self.tabs.tabText(self.tabs.currentIndex()).lower():
 
-            return 0
+            return
 
-        percent = (checked / total) * 100 if total else 0
-        value.append(int(percent))
+        if self.models[tab].filling():
 
-        return value
+            self.progress_label.setText(f"LOADING {tab.upper()} ROWS ({loaded}/{total}) : ")
+            self.progress_bar.setRange(0, total)
+            self.progress_bar.setValue(loaded)
 
-    def calculate_total_progress(self):
+        else:
+
+            self.update_progress_bar(tab)
 
-        total = len(self.io_list)
-        total -= sum(1 for r in self.io_list if isinstance(r[4], tuple) and r[4][0] == "N/A")
-        total += 2 * len(self.manual_list)
-        total -= sum((isinstance(r[2], tuple) and r[2][0] == "N/A") + (isinstance(r[5], tuple) and r[5][0] == "N/A") for r in self.manual_list)
-        total += len(self.sequence_list)
-        total -= sum(1 for r in self.sequence_list if isinstance(r[3], tuple) and r[3][0] == "N/A")
+    def cancel_fill(self):
 
-        checked = sum(1 for r in self.io_list if isinstance(r[4], tuple) and r[4][0] == "OK")
-        checked += sum((isinstance(r[2], tuple) and r[2][0] == "OK") + (isinstance(r[5], tuple) and r[5][0] == "OK") for r in self.manual_list)
-        checked += sum(1 for r in self.sequence_list if isinstance(r[3], tuple) and r[3][0] == "OK")
+        for model in self.models.values():
 
-        percent = (checked / total) * 100 if total else 0
+            model.cancel_fill()
 
-        return int(percent)
+        self.status_label.setText("INFO: Table loading cancelled. Remaining rows are loaded while scrolling.")
 
     def update_progress_bar(self, tab):
 
+        if tab in self.models and self.models[tab].filling():
+
+            return
+
+        self.progress_bar.setRange(0, 100)
+
         if tab == "overview":
 
             progress_value = self.calculate_total_progress()
@@ -1122,6 +1684,11 @@ class MainWindow(QtWidgets.QMainWindow):
             self.progress_label.setText("TOTAL PROGRESS : ")
             self.progress_bar.setValue(progress_value)
 
+        elif tab == "portfolio":
+
+            self.progress_label.setText("PORTFOLIO PROGRESS : ")
+            self.progress_bar.setValue(ctpportfolio.total_percent(self.portfolio.counts()) if self.portfolio else 0)
+
         else:
             value = self.calculate_progress(tab)
 
@@ -1145,6 +1712,8 @@ class MainWindow(QtWidgets.QMainWindow):
 
     def closeEvent(self, event):
 
+        self.commit_open_editors()
+
         if not self.data_saved:
 
             reply = QMessageBox.question(self, 'Save Before Exit?', "WARNING: Do you want to save your unsaved changes before exit?", QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No | QMessageBox.StandardButton.Cancel)
@@ -1163,6 +1732,7 @@ class MainWindow(QtWidgets.QMainWindow):
 
             elif reply == QMessageBox.StandardButton.No:
 
+                self.close_journal(discard=True)
                 event.accept()
 
             else:
@@ -1186,7 +1756,7 @@ class MainWindow(QtWidgets.QMainWindow):
                 total_width = table.viewport().width()
                 other_width = 0
 
-                for i in range(table.columnCount()):
+                for i in range(table.model().columnCount()):
 
                     if i not in [comment1_col, comment2_col]:
 
@@ -1203,6 +1773,7 @@ class MainWindow(QtWidgets.QMainWindow):
 
 def main():
 
+    multiprocessing.freeze_support()
     app = QtWidgets.QApplication(sys.argv)
     settings = QtCore.QSettings("BOSCH", "CTP")
     window = MainWindow()
@@ -1211,5 +1782,14 @@ def main():
     window.show()
     sys.exit(app.exec())
 
+def batch_main(argv):
+
+    # Command line batch mode, runs without a QApplication: ctptool.py --batch --help
+    multiprocessing.freeze_support()
+    sys.exit(ctpbatch.main(argv))
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    if sys.argv[1:2] == ["--batch"]:
+        batch_main(sys.argv[2:])
+    else:
+        main()
\ No newline at end of file
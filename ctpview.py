@@ -0,0 +1,292 @@
+import time
+import bisect
+from PyQt6 import QtWidgets, QtCore
+import ctpmodel
+
+# Model/view pieces for the IO, MANUAL and SEQUENCE tabs. Rows are served straight from the window's
+# row lists and editors only exist while a cell is being edited.
+
+STATUS_CHOICES = ["X", "OK", "N/A"]
+# A cell nobody has checked yet is shown as "X", so the "X" filter covers both.
+STATUS_FILTERS = {"X": (ctpmodel.Status.UNSET, ctpmodel.Status.X), "OK": (ctpmodel.Status.OK,), "N/A": (ctpmodel.Status.NA,)}
+FILL_CHUNK = 500
+FILL_BUDGET = 0.02
+
+
+class RowTableModel(QtCore.QAbstractTableModel):
+
+    # (tab, rows shown, total rows) while the view is being filled
+    fill_progress = QtCore.pyqtSignal(str, int, int)
+
+    def __init__(self, window, tab, headers):
+
+        super().__init__()
+
+        self.window = window
+        self.tab = tab
+        self.headers = headers
+        self.row_class = ctpmodel.ROW_CLASSES[tab]
+        self.rows = []
+        self.order = None
+        self.loaded = 0
+        self.fill_timer = QtCore.QTimer(self)
+        self.fill_timer.timeout.connect(self.fill_batch)
+
+    def set_rows(self, rows, order=None):
+
+        # Rows are handed to the view in time-boxed batches from the event loop so the window stays responsive.
+        self.fill_timer.stop()
+        self.beginResetModel()
+        self.rows = rows
+        self.order = order
+        # The first screen of rows is shown right away, the rest follows from the timer.
+        self.loaded = min(FILL_CHUNK, self.total())
+        self.endResetModel()
+
+        if self.loaded < self.total():
+
+            self.fill_timer.start(0)
+
+        self.fill_progress.emit(self.tab, self.loaded, self.total())
+
+    def set_filter(self, order):
+
+        # order holds the sorted positions of the rows to show, None shows every row.
+        if order is not None or self.order is not None:
+
+            self.set_rows(self.rows, order)
+
+    def total(self):
+
+        return len(self.rows) if self.order is None else len(self.order)
+
+    def source_row(self, row):
+
+        return row if self.order is None else self.order[row]
+
+    def view_row(self, position):
+
+        if self.order is None:
+
+            return position
+
+        row = bisect.bisect_left(self.order, position)
+
+        return row if row < len(self.order) and self.order[row] == position else -1
+
+    def rows_appended(self):
+
+        # The row list grew in place while a project is being loaded, new rows are filled in like the first ones.
+        if self.order is None and not self.filling() and self.loaded < self.total():
+
+            self.fill_timer.start(0)
+
+    def filling(self):
+
+        return self.fill_timer.isActive()
+
+    def load_rows(self, count):
+
+        count = min(count, self.total() - self.loaded)
+
+        if count <= 0:
+
+            return
+
+        self.beginInsertRows(QtCore.QModelIndex(), self.loaded, self.loaded + count - 1)
+        self.loaded += count
+        self.endInsertRows()
+
+    def fill_batch(self):
+
+        deadline = time.perf_counter() + FILL_BUDGET
+
+        while self.loaded < self.total() and time.perf_counter() < deadline:
+
+            self.load_rows(FILL_CHUNK)
+
+        if self.loaded >= self.total():
+
+            self.fill_timer.stop()
+
+        self.fill_progress.emit(self.tab, self.loaded, self.total())
+
+    def cancel_fill(self):
+
+        # The remaining rows are still fetched on demand when the view is scrolled to the end.
+        if self.filling():
+
+            self.fill_timer.stop()
+            self.fill_progress.emit(self.tab, self.loaded, self.total())
+
+    def canFetchMore(self, parent=QtCore.QModelIndex()):
+
+        return not parent.isValid() and self.loaded < self.total()
+
+    def fetchMore(self, parent=QtCore.QModelIndex()):
+
+        if not parent.isValid():
+
+            self.load_rows(FILL_CHUNK)
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+
+        return 0 if parent.isValid() else self.loaded
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+
+        return 0 if parent.isValid() else len(self.headers)
+
+    def headerData(self, section, orientation, role=QtCore.Qt.ItemDataRole.DisplayRole):
+
+        if orientation == QtCore.Qt.Orientation.Horizontal and role == QtCore.Qt.ItemDataRole.DisplayRole:
+
+            return self.headers[section]
+
+        return super().headerData(section, orientation, role)
+
+    def is_check(self, col):
+
+        return col in self.row_class.CHECK_COLUMNS
+
+    def is_comment(self, col):
+
+        return col in self.row_class.COMMENT_COLUMNS
+
+    def flags(self, index):
+
+        flags = super().flags(index)
+
+        if self.is_check(index.column()) or self.is_comment(index.column()):
+
+            flags |= QtCore.Qt.ItemFlag.ItemIsEditable
+
+        return flags
+
+    def data(self, index, role=QtCore.Qt.ItemDataRole.DisplayRole):
+
+        if not index.isValid():
+
+            return None
+
+        row = self.rows[self.source_row(index.row())]
+        col = index.column()
+
+        if role in (QtCore.Qt.ItemDataRole.DisplayRole, QtCore.Qt.ItemDataRole.EditRole):
+
+            if self.is_check(col):
+
+                # A freshly parsed "." is shown as "X", like the first entry of the combo box.
+                status = row.check(col)[0]
+
+                return "X" if status == ctpmodel.Status.UNSET else ctpmodel.STATUS_TEXTS[status]
+
+            if self.is_comment(col):
+
+                return row.comment(col)[0]
+
+            return row.text(col)
+
+        if role == QtCore.Qt.ItemDataRole.ToolTipRole and (self.is_check(col) or self.is_comment(col)):
+
+            user_id = row.check(col)[1] if self.is_check(col) else row.comment(col)[1]
+            user = self.window.users.name(user_id)
+
+            return f"Last modified by: {user}" if user else "No modifications yet."
+
+        if role == QtCore.Qt.ItemDataRole.TextAlignmentRole and not self.is_comment(col):
+
+            return QtCore.Qt.AlignmentFlag.AlignCenter
+
+        return None
+
+    def setData(self, index, value, role=QtCore.Qt.ItemDataRole.EditRole):
+
+        if not index.isValid() or role != QtCore.Qt.ItemDataRole.EditRole:
+
+            return False
+
+        if value == self.data(index, role):
+
+            return False
+
+        if self.is_check(index.column()):
+
+            self.window.combobox_changed(self.tab, self.source_row(index.row()), index.column(), value)
+
+        elif self.is_comment(index.column()):
+
+            self.window.comment_changed(self.tab, self.source_row(index.row()), index.column(), value)
+
+        else:
+
+            return False
+
+        return True
+
+    def shown_rows(self):
+
+        # Row positions behind the current filter, including the ones the view hasn't loaded yet.
+        return range(len(self.rows)) if self.order is None else self.order
+
+    def rows_changed(self):
+
+        if self.loaded:
+
+            self.dataChanged.emit(self.index(0, 0), self.index(self.loaded - 1, self.columnCount() - 1))
+
+    def cell_changed(self, position, col):
+
+        row = self.view_row(position)
+
+        if 0 <= row < self.loaded:
+
+            index = self.index(row, col)
+            self.dataChanged.emit(index, index)
+
+
+class CellDelegate(QtWidgets.QStyledItemDelegate):
+
+    def createEditor(self, parent, option, index):
+
+        if index.model().is_check(index.column()):
+
+            cb = QtWidgets.QComboBox(parent)
+            cb.addItems(STATUS_CHOICES)
+            cb.activated.connect(lambda _, editor=cb: self.commit_and_close(editor))
+            QtCore.QTimer.singleShot(0, cb.showPopup)
+
+            return cb
+
+        return QtWidgets.QLineEdit(parent)
+
+    def setEditorData(self, editor, index):
+
+        value = index.data(QtCore.Qt.ItemDataRole.EditRole)
+
+        if isinstance(editor, QtWidgets.QComboBox):
+
+            editor.setCurrentIndex(max(0, editor.findText(value)))
+
+        else:
+
+            editor.setText(value)
+
+    def setModelData(self, editor, model, index):
+
+        if isinstance(editor, QtWidgets.QComboBox):
+
+            model.setData(index, editor.currentText())
+
+        else:
+
+            model.setData(index, editor.text())
+
+    def updateEditorGeometry(self, editor, option, index):
+
+        editor.setGeometry(option.rect)
+
+    def commit_and_close(self, editor):
+
+        self.commitData.emit(editor)
+        self.closeEditor.emit(editor)